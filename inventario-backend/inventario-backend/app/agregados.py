@@ -0,0 +1,224 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import Date, and_, bindparam, case, delete, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import Producto, MovimientoInventario, Venta, VentaDetalle, VentaDiaria, StockDiario
+
+DECIMALES_COSTO = Decimal('0.0001')
+
+
+def insert_con_conflicto(modelo):
+    """insert() del dialecto en uso, que admite on_conflict_do_update / do_nothing"""
+    dialecto = {'postgresql': postgresql, 'sqlite': sqlite}[db.session.get_bind().dialect.name]
+    return dialecto.insert(modelo)
+
+
+def _insert_acumulando(modelo, filas, claves, columnas):
+    """INSERT ... ON CONFLICT (claves) DO UPDATE SET col = col + excluded.col"""
+    sentencia = insert_con_conflicto(modelo).values(filas)
+    return sentencia.on_conflict_do_update(
+        index_elements=claves,
+        set_={c: getattr(modelo, c) + getattr(sentencia.excluded, c) for c in columnas}
+    )
+
+
+def acumular_venta(fecha, lineas, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1, cancelación) una venta en ventas_diarias.
+    lineas: [{'producto_id', 'cantidad', 'precio_unitario'}, ...]
+    """
+    por_producto = defaultdict(lambda: {'cantidad': 0, 'ingresos': 0})
+    for item in lineas:
+        acumulado = por_producto[item['producto_id']]
+        acumulado['cantidad'] += item['cantidad']
+        acumulado['ingresos'] += item['cantidad'] * item['precio_unitario']
+
+    if not por_producto:
+        return
+
+    filas = [{
+        'dia': fecha.date(),
+        'producto_id': producto_id,
+        'cantidad': signo * a['cantidad'],
+        'ingresos': signo * a['ingresos'],
+        'num_ventas': signo
+    } for producto_id, a in por_producto.items()]
+
+    db.session.execute(_insert_acumulando(
+        VentaDiaria, filas,
+        claves=['dia', 'producto_id'],
+        columnas=['cantidad', 'ingresos', 'num_ventas']
+    ))
+
+
+def reconstruir_ventas_diarias():
+    """Recalcula ventas_diarias completo desde ventas y ventas_detalle"""
+    dia = func.date(Venta.fecha)
+    origen = db.session.query(
+        dia,
+        VentaDetalle.producto_id,
+        func.sum(VentaDetalle.cantidad),
+        func.sum(VentaDetalle.subtotal),
+        func.count(func.distinct(VentaDetalle.venta_id))
+    ).join(Venta, VentaDetalle.venta_id == Venta.id
+    ).group_by(dia, VentaDetalle.producto_id)
+
+    db.session.query(VentaDiaria).delete()
+    db.session.execute(insert(VentaDiaria).from_select(
+        ['dia', 'producto_id', 'cantidad', 'ingresos', 'num_ventas'], origen
+    ))
+    db.session.commit()
+
+    return db.session.query(func.count()).select_from(VentaDiaria).scalar()
+
+
+def reconstruir_ultimos_movimientos(producto_ids=None, conexion=None):
+    """
+    Recalcula productos.ultimo_movimiento y ultima_venta desde el historial,
+    de todos los productos o solo de producto_ids (sin commit).
+    """
+    ultimo_movimiento = select(func.max(MovimientoInventario.fecha)).where(
+        MovimientoInventario.producto_id == Producto.id
+    ).scalar_subquery()
+    ultima_venta = select(func.max(Venta.fecha)).join(
+        VentaDetalle, VentaDetalle.venta_id == Venta.id
+    ).where(VentaDetalle.producto_id == Producto.id).scalar_subquery()
+
+    sentencia = update(Producto).values(ultimo_movimiento=ultimo_movimiento, ultima_venta=ultima_venta)
+    if producto_ids is not None:
+        sentencia = sentencia.where(Producto.id.in_(list(producto_ids)))
+
+    # Solo fechas del kardex: como el stock, no cambia la versión del catálogo
+    resultado = (conexion or db.session).execute(
+        sentencia.execution_options(synchronize_session=False, solo_stock=True)
+    )
+    return resultado.rowcount
+
+
+def costo_promedio(stock_anterior, costo_anterior, cantidad, costo_unitario):
+    """Costo promedio ponderado después de comprar `cantidad` unidades a costo_unitario"""
+    existencias = max(stock_anterior, 0)  # el stock negativo no tiene costo que promediar
+    if existencias + cantidad <= 0:
+        return Decimal(str(costo_unitario)).quantize(DECIMALES_COSTO)
+    total = existencias * Decimal(costo_anterior or 0) + cantidad * Decimal(str(costo_unitario))
+    return (total / (existencias + cantidad)).quantize(DECIMALES_COSTO)
+
+
+def costo_sin_compra(stock_anterior, costo_anterior, cantidad, costo_unitario):
+    """
+    Deshace costo_promedio al revertir una compra de `cantidad` unidades a
+    costo_unitario. Si no quedan existencias o el resultado sería negativo
+    (ya se vendió a ese costo) conserva el costo vigente.
+    """
+    restantes = stock_anterior - cantidad
+    total = stock_anterior * Decimal(costo_anterior or 0) - cantidad * Decimal(str(costo_unitario))
+    if restantes <= 0 or total < 0:
+        return Decimal(costo_anterior or 0)
+    return (total / restantes).quantize(DECIMALES_COSTO)
+
+
+def reconstruir_costos(conexion=None, bloque=5000, producto_ids=None):
+    """
+    Recalcula productos.costo_promedio desde el kardex en una sola pasada, de
+    todos los productos o solo de producto_ids: cada producto parte de su
+    precio_compra y promedia sus entradas por compra en orden; las salidas por
+    compra (reversiones) deshacen su promedio igual que al eliminar la compra.
+    Devuelve la cantidad de productos con compras (sin commit).
+    """
+    ejecutar = (conexion or db.session).execute
+    reinicio = update(Producto).values(costo_promedio=func.coalesce(Producto.precio_compra, 0))
+    if producto_ids is not None:
+        reinicio = reinicio.where(Producto.id.in_(list(producto_ids)))
+    ejecutar(reinicio.execution_options(synchronize_session=False))
+
+    compras = select(
+        MovimientoInventario.producto_id,
+        MovimientoInventario.tipo,
+        MovimientoInventario.stock_anterior,
+        MovimientoInventario.cantidad,
+        MovimientoInventario.costo_unitario,
+        Producto.precio_compra
+    ).join(Producto, MovimientoInventario.producto_id == Producto.id).where(
+        MovimientoInventario.motivo == 'compra',
+        MovimientoInventario.costo_unitario != None
+    ).order_by(
+        MovimientoInventario.producto_id, MovimientoInventario.fecha, MovimientoInventario.id
+    )
+    if producto_ids is not None:
+        compras = compras.where(MovimientoInventario.producto_id.in_(list(producto_ids)))
+    compras = ejecutar(compras.execution_options(yield_per=bloque))
+
+    costos = {}
+    for fila in compras:
+        anterior = costos.get(fila.producto_id, fila.precio_compra)
+        calcular = costo_promedio if fila.tipo == 'entrada' else costo_sin_compra
+        costos[fila.producto_id] = calcular(fila.stock_anterior, anterior, fila.cantidad, fila.costo_unitario)
+
+    productos = Producto.__table__
+    sentencia = update(productos).where(productos.c.id == bindparam('b_id')).values(costo_promedio=bindparam('b_costo'))
+    filas = [{'b_id': producto_id, 'b_costo': costo} for producto_id, costo in costos.items()]
+    for inicio in range(0, len(filas), bloque):
+        ejecutar(sentencia, filas[inicio:inicio + bloque])
+    return len(costos)
+
+
+def _cambios_de_stock(desde, hasta=None):
+    """Suma de entradas menos salidas por producto con fecha en [desde, hasta)"""
+    delta = case((MovimientoInventario.tipo == 'entrada', MovimientoInventario.cantidad),
+                 else_=-MovimientoInventario.cantidad)
+    filtro = [MovimientoInventario.fecha >= desde]
+    if hasta is not None:
+        filtro.append(MovimientoInventario.fecha < hasta)
+    return select(
+        MovimientoInventario.producto_id, func.sum(delta).label('delta')
+    ).where(*filtro).group_by(MovimientoInventario.producto_id).subquery()
+
+
+def stock_historico(corte):
+    """
+    Subconsulta (producto_id, stock) con el stock de cada producto en el instante `corte`.
+
+    El kardex es la única fuente: todo stock, también el inicial, entra por un
+    movimiento, así que el stock en `corte` es la suma de los movimientos
+    anteriores. Se suman desde el último cierre de stock_diario anterior al
+    corte (o desde el primer movimiento si no hay cierres), o, si el corte está
+    más cerca de hoy, se descuentan del stock actual los movimientos desde el
+    corte. Solo se lee el más corto de los dos tramos; cerrar-stock-diario los acota.
+    """
+    ultimo_cierre = db.session.query(func.max(StockDiario.dia)).filter(
+        StockDiario.dia < corte.date()
+    ).scalar()
+    if ultimo_cierre is not None:
+        desde = datetime.combine(ultimo_cierre + timedelta(days=1), datetime.min.time())
+    else:
+        desde = db.session.query(func.min(MovimientoInventario.fecha)).scalar() or corte
+    ahora = datetime.utcnow()
+
+    if ahora - corte < corte - desde:
+        cambios = _cambios_de_stock(corte)
+        stock = Producto.stock_actual - func.coalesce(cambios.c.delta, 0)
+        consulta = select(Producto.id.label('producto_id'), stock.label('stock'))
+    elif ultimo_cierre is None:
+        cambios = _cambios_de_stock(desde, corte)
+        stock = func.coalesce(cambios.c.delta, 0)
+        consulta = select(Producto.id.label('producto_id'), stock.label('stock'))
+    else:
+        cambios = _cambios_de_stock(desde, corte)
+        stock = func.coalesce(StockDiario.stock, 0) + func.coalesce(cambios.c.delta, 0)
+        consulta = select(Producto.id.label('producto_id'), stock.label('stock')).outerjoin(
+            StockDiario, and_(StockDiario.producto_id == Producto.id, StockDiario.dia == ultimo_cierre)
+        )
+    return consulta.outerjoin(cambios, cambios.c.producto_id == Producto.id).subquery()
+
+
+def cerrar_stock_diario(dia):
+    """Guarda en stock_diario el stock de cierre de `dia` (reemplaza el cierre si ya existía, sin commit)"""
+    db.session.execute(delete(StockDiario).where(StockDiario.dia == dia))
+    historico = stock_historico(datetime.combine(dia + timedelta(days=1), datetime.min.time()))
+    resultado = db.session.execute(insert(StockDiario).from_select(
+        ['dia', 'producto_id', 'stock'],
+        select(literal(dia, Date), historico.c.producto_id, historico.c.stock).where(historico.c.stock != 0)
+    ))
+    return resultado.rowcount
@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class CacheTTL:
+    """
+    Cache en memoria del proceso con expiración por entrada.
+
+    limpiar() incrementa una generación: un valor calculado antes de una
+    invalidación no se guarda, aunque termine de calcularse después.
+    """
+
+    def __init__(self):
+        self._datos = {}
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def generacion(self):
+        return self._generacion
+
+    def obtener(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada and entrada[0] > time.monotonic():
+            return entrada[1]
+        return None
+
+    def guardar(self, clave, valor, ttl, generacion=None):
+        with self._lock:
+            if generacion is not None and generacion != self._generacion:
+                return
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
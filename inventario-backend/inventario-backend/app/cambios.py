@@ -0,0 +1,47 @@
+from sqlalchemy import event
+from app import db
+
+# Funciones f(tablas) que se llaman después de cada commit que modificó datos
+_suscriptores = []
+
+
+def al_confirmar(func):
+    """Registra func para recibir el conjunto de tablas modificadas en cada commit"""
+    _suscriptores.append(func)
+    return func
+
+
+def _marcar(session, *tablas):
+    session.info.setdefault('tablas_modificadas', set()).update(tablas)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _cambios_orm(session, contexto):
+    """Objetos agregados, modificados o borrados con el ORM"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        _marcar(session, obj.__table__.name)
+
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _cambios_sentencia(estado):
+    """
+    INSERT/UPDATE/DELETE ejecutados directo, p. ej. las inserciones en bloque del ledger.
+    Las sentencias con execution_options(solo_stock=True) se anotan como 'stock'
+    en lugar de 'productos': cambian existencias, no el catálogo.
+    """
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabla = 'stock' if estado.execution_options.get('solo_stock') else estado.statement.table.name
+        _marcar(estado.session, tabla)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _notificar(session):
+    tablas = session.info.pop('tablas_modificadas', None)
+    if tablas:
+        for func in _suscriptores:
+            func(tablas)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar(session):
+    session.info.pop('tablas_modificadas', None)
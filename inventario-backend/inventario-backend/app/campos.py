@@ -0,0 +1,64 @@
+"""
+Respuestas parciales con ?fields=, p. ej. /api/productos?fields=id,sku,stock_actual
+
+Con ?fields= el listado hace SELECT solo de esas columnas (sin crear objetos
+del ORM) y cada fila pasa a dict tal cual; Decimal y datetime los convierte
+el proveedor JSON (app.respuestas). Se pueden pedir las columnas del modelo y
+las claves que declare su campos(); las listas anidadas (detalles) solo salen
+en to_dict().
+"""
+from functools import lru_cache
+from flask import request
+from sqlalchemy import inspect
+
+
+class CampoInvalido(ValueError):
+    """?fields= pide un campo que el listado no tiene"""
+
+
+def _disponibles(modelo):
+    campos = {c.key: getattr(modelo, c.key) for c in inspect(modelo).column_attrs}
+    if hasattr(modelo, 'campos'):
+        campos.update(modelo.campos())
+    return campos
+
+
+@lru_cache(maxsize=256)
+def _compilar(modelo, nombres):
+    disponibles = _disponibles(modelo)
+    desconocidos = [n for n in nombres if n not in disponibles]
+    if desconocidos:
+        raise CampoInvalido(', '.join(desconocidos))
+
+    columnas = tuple(disponibles[n].label(n) for n in nombres)
+
+    def a_dict(fila):
+        return dict(zip(nombres, fila))
+
+    return columnas, a_dict
+
+
+def _a_dict(objeto):
+    return objeto.to_dict()
+
+
+def seleccionar(query, extra=()):
+    """
+    Aplica ?fields= a una consulta del ORM ya filtrada.
+    Devuelve (query, fila -> dict); sin ?fields= la consulta no cambia y se usa to_dict().
+
+    extra son columnas que quien llama necesita leer de cada fila por su nombre
+    (p. ej. las del cursor de paginar()); no se incluyen en el dict.
+    """
+    pedidos = request.args.get('fields')
+    if not pedidos:
+        return query, _a_dict
+
+    nombres = tuple(dict.fromkeys(n.strip() for n in pedidos.split(',') if n.strip()))
+    if not nombres:
+        raise CampoInvalido(pedidos)
+
+    modelo = query.column_descriptions[0]['entity']
+    columnas, a_dict = _compilar(modelo, nombres)
+    ocultas = [c.label(c.key) for c in extra if c.key not in nombres]
+    return query.with_entities(*columnas, *ocultas), a_dict
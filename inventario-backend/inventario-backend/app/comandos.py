@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import click
+from app.agregados import reconstruir_ventas_diarias, reconstruir_ultimos_movimientos, reconstruir_costos
+
+
+def registrar_comandos(app):
+    """Comandos de mantenimiento: flask <comando>"""
+
+    @app.cli.command('migrar')
+    def migrar_cmd():
+        """Aplica las migraciones de esquema pendientes"""
+        from app.migraciones import migrar
+        aplicadas = migrar()
+        for nombre in aplicadas:
+            click.echo(f'Aplicada {nombre}')
+        if not aplicadas:
+            click.echo('El esquema está al día')
+
+    @app.cli.command('generar-alertas-stock')
+    def generar_alertas_stock_cmd():
+        """Revisión general de stock bajo, para correr programada (cron / systemd timer)"""
+        from app import db
+        from app.inventario import generar_alertas_stock
+        creadas = generar_alertas_stock()
+        db.session.commit()
+        click.echo(f'Se generaron {creadas} alertas')
+
+    @app.cli.command('archivar-alertas')
+    @click.option('--dias', default=30, show_default=True, help='Antigüedad mínima de las alertas leídas')
+    def archivar_alertas_cmd(dias):
+        """Mueve a alertas_archivo las alertas leídas antiguas"""
+        from app import db
+        from app.inventario import archivar_alertas
+        movidas = archivar_alertas(dias)
+        db.session.commit()
+        click.echo(f'Se archivaron {movidas} alertas')
+
+    @app.cli.command('purgar-idempotencia')
+    @click.option('--dias', type=int, help='Antigüedad mínima de las claves (por defecto IDEMPOTENCIA_DIAS)')
+    def purgar_idempotencia_cmd(dias):
+        """Borra las Idempotency-Key antiguas, para correr programado"""
+        from app import db
+        from app.idempotencia import purgar_claves
+        borradas = purgar_claves(dias or app.config['IDEMPOTENCIA_DIAS'])
+        db.session.commit()
+        click.echo(f'Se borraron {borradas} claves de idempotencia')
+
+    @app.cli.command('reconstruir-ventas-diarias')
+    def reconstruir_ventas_diarias_cmd():
+        """Recalcula el acumulado diario de ventas desde el historial"""
+        filas = reconstruir_ventas_diarias()
+        click.echo(f'ventas_diarias reconstruida: {filas} filas')
+
+    @app.cli.command('reconstruir-ultimos-movimientos')
+    def reconstruir_ultimos_movimientos_cmd():
+        """Recalcula la fecha del último movimiento y de la última venta de cada producto"""
+        from app import db
+        productos = reconstruir_ultimos_movimientos()
+        db.session.commit()
+        click.echo(f'Se actualizaron {productos} productos')
+
+    @app.cli.command('reconstruir-costos')
+    def reconstruir_costos_cmd():
+        """Recalcula el costo promedio de cada producto recorriendo el kardex una vez"""
+        from app import db
+        productos = reconstruir_costos()
+        db.session.commit()
+        click.echo(f'Costo promedio recalculado para {productos} productos con compras')
+
+    @app.cli.command('cerrar-stock-diario')
+    @click.option('--dia', type=click.DateTime(['%Y-%m-%d']), help='Día a cerrar (por defecto ayer, UTC)')
+    @click.option('--desde', type=click.DateTime(['%Y-%m-%d']), help='Cerrar también los días desde esta fecha')
+    def cerrar_stock_diario_cmd(dia, desde):
+        """Guarda el stock de cierre por producto, para correr programado después de medianoche"""
+        from app import db
+        from app.agregados import cerrar_stock_diario
+        dia = dia.date() if dia else datetime.utcnow().date() - timedelta(days=1)
+        actual = desde.date() if desde else dia
+        while actual <= dia:
+            filas = cerrar_stock_diario(actual)
+            db.session.commit()
+            click.echo(f'{actual}: {filas} productos')
+            actual += timedelta(days=1)
@@ -0,0 +1,107 @@
+"""
+Conexiones a la base: statement_timeout por blueprint y estado del pool.
+
+Cada transacción de una solicitud empieza con SET LOCAL statement_timeout según
+TIMEOUTS_SENTENCIA (endpoint, luego blueprint, luego TIMEOUT_SENTENCIA), así un
+reporte pesado se corta solo y no deja a los POS sin conexiones.
+"""
+import threading
+from flask import current_app, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError, TimeoutError as TimeoutPool
+from sqlalchemy.pool import QueuePool
+from app import db
+
+_lock = threading.Lock()
+_contadores = {
+    'checkouts': 0,
+    'checkouts_saturado': 0,  # el pool quedó sin conexiones libres al entregar esta
+    'pico_en_uso': 0,
+    'timeouts_pool': 0,
+    'timeouts_sentencia': 0
+}
+
+
+def _sumar(nombre, cantidad=1):
+    with _lock:
+        _contadores[nombre] += cantidad
+
+
+def timeout_sentencia():
+    """statement_timeout en ms para la solicitud actual (0 = sin límite, p. ej. comandos CLI)"""
+    if not has_request_context():
+        return 0
+    por_ruta = current_app.config.get('TIMEOUTS_SENTENCIA', {})
+    for clave in (request.endpoint, request.blueprint):
+        if clave in por_ruta:
+            return por_ruta[clave]
+    return current_app.config.get('TIMEOUT_SENTENCIA', 0)
+
+
+@event.listens_for(db.session, 'after_begin')
+def _fijar_timeout(session, transaccion, conexion):
+    if conexion.dialect.name == 'postgresql':
+        conexion.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout_sentencia())}')
+
+
+def _limite(pool):
+    """Conexiones que puede entregar un QueuePool a la vez (None si no tiene límite)"""
+    if pool._max_overflow < 0:
+        return None
+    return pool.size() + pool._max_overflow
+
+
+def _vigilar_pool(motor):
+    pool = motor.pool
+    if not isinstance(pool, QueuePool):
+        return  # SQLite en memoria, NullPool, etc.
+
+    @event.listens_for(motor, 'checkout')
+    def _al_entregar(conexion_dbapi, registro, proxy):
+        en_uso = pool.checkedout()
+        limite = _limite(pool)
+        with _lock:
+            _contadores['checkouts'] += 1
+            _contadores['pico_en_uso'] = max(_contadores['pico_en_uso'], en_uso)
+            if limite is not None and en_uso >= limite:
+                _contadores['checkouts_saturado'] += 1
+
+
+def estado_pool():
+    """Uso actual del pool del proceso y contadores acumulados (/api/health/pool)"""
+    pool = db.engine.pool
+    estado = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        en_uso = pool.checkedout()
+        limite = _limite(pool)
+        estado.update({
+            'tamano': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'en_uso': en_uso,
+            'libres': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'saturacion': round(en_uso / limite, 2) if limite else None
+        })
+    with _lock:
+        estado.update(_contadores)
+    return estado
+
+
+def configurar_conexiones(app):
+    """Métricas del pool y respuestas 503 cuando la base no da abasto"""
+    with app.app_context():
+        _vigilar_pool(db.engine)
+
+    @app.errorhandler(TimeoutPool)
+    def pool_agotado(e):
+        _sumar('timeouts_pool')
+        return {'error': 'Base de datos ocupada, intente de nuevo'}, 503
+
+    @app.errorhandler(OperationalError)
+    def error_operacional(e):
+        # 57014 = query_canceled (statement_timeout)
+        if getattr(e.orig, 'pgcode', None) != '57014':
+            raise e
+        db.session.rollback()
+        _sumar('timeouts_sentencia')
+        return {'error': 'La consulta tardó demasiado, intente de nuevo'}, 503
@@ -0,0 +1,144 @@
+"""
+Eventos de inventario para /api/alertas/stream (Server-Sent Events).
+
+El ledger anota eventos en la sesión (stock, alerta) y al confirmar se agrega
+una marca 'alertas' si cambió la tabla alertas. Con PostgreSQL los eventos de
+la transacción se envían como un arreglo JSON en un solo NOTIFY (partido si no
+cabe en el límite de 8000 bytes) dentro de la misma transacción, así que solo
+llegan si hay commit, y un hilo por proceso los recibe con LISTEN; con otros
+motores (tests, SQLite) se publican directo en memoria después del commit.
+Quien reparte los eventos reemplaza la marca por el contador de alertas
+pendientes, contado una vez por tanda y fuera de la transacción que escribe.
+"""
+import json
+import queue
+import select
+import threading
+import time
+from sqlalchemy import event, func, text
+from app import db
+
+CANAL = 'inventario'
+LIMITE_NOTIFY = 7900  # bytes por NOTIFY; PostgreSQL acepta hasta 8000
+
+_suscriptores = set()
+_lock = threading.Lock()
+_escucha = None
+
+
+def anotar(session, evento):
+    """Agrega un evento para publicar cuando la transacción se confirme"""
+    session.info.setdefault('eventos', []).append(evento)
+
+
+def suscribir(engine):
+    """Cola que recibe todos los eventos publicados a partir de ahora"""
+    cola = queue.Queue(maxsize=1000)
+    with _lock:
+        _suscriptores.add(cola)
+    if engine.dialect.name == 'postgresql':
+        _iniciar_escucha(engine)
+    return cola
+
+
+def desuscribir(cola):
+    with _lock:
+        _suscriptores.discard(cola)
+
+
+def _publicar_local(evento):
+    with _lock:
+        colas = list(_suscriptores)
+    for cola in colas:
+        try:
+            cola.put_nowait(evento)
+        except queue.Full:
+            pass  # cliente que no está leyendo; pierde eventos en lugar de frenar a los demás
+
+
+def _pendientes(engine):
+    from app.models import Alerta
+    with engine.connect() as conexion:
+        return conexion.scalar(func.count(Alerta.id).select().where(Alerta.leida == False))
+
+
+def _repartir(eventos, engine):
+    """Publica en este proceso; las marcas 'alertas' salen como un solo evento con el contador"""
+    contar = False
+    for evento in eventos:
+        if evento['evento'] == 'alertas':
+            contar = True
+        else:
+            _publicar_local(evento)
+    if contar and _suscriptores:
+        _publicar_local({'evento': 'alertas', 'pendientes': _pendientes(engine)})
+
+
+def _lotes(eventos):
+    """Arreglos JSON con los eventos, cada uno de a lo sumo LIMITE_NOTIFY bytes"""
+    lote = []
+    tamano = 2
+    for evento in eventos:
+        datos = json.dumps(evento)  # ASCII: un carácter = un byte
+        if lote and tamano + len(datos) + 1 > LIMITE_NOTIFY:
+            yield '[' + ','.join(lote) + ']'
+            lote, tamano = [], 2
+        lote.append(datos)
+        tamano += len(datos) + 1
+    if lote:
+        yield '[' + ','.join(lote) + ']'
+
+
+@event.listens_for(db.session, 'before_commit')
+def _preparar(session):
+    session.flush()
+    if 'alertas' in session.info.get('tablas_modificadas', set()):
+        anotar(session, {'evento': 'alertas'})
+
+    eventos = session.info.get('eventos')
+    if eventos and session.get_bind().dialect.name == 'postgresql':
+        for datos in _lotes(session.info.pop('eventos')):
+            session.execute(text('SELECT pg_notify(:canal, :datos)'), {'canal': CANAL, 'datos': datos})
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publicar(session):
+    eventos = session.info.pop('eventos', None)
+    if eventos:
+        _repartir(eventos, session.get_bind())
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _descartar(session):
+    session.info.pop('eventos', None)
+
+
+def _iniciar_escucha(engine):
+    global _escucha
+    with _lock:
+        if _escucha is not None and _escucha.is_alive():
+            return
+        _escucha = threading.Thread(target=_escuchar, args=(engine,), daemon=True, name='inventario-listen')
+        _escucha.start()
+
+
+def _escuchar(engine):
+    """LISTEN en una conexión propia (fuera del pool) y reparte a las colas del proceso"""
+    while True:
+        try:
+            conexion = engine.raw_connection()
+            conexion.detach()
+            dbapi = conexion.dbapi_connection
+            dbapi.autocommit = True
+            with dbapi.cursor() as cursor:
+                cursor.execute(f'LISTEN {CANAL}')
+            while True:
+                if select.select([dbapi], [], [], 15) == ([], [], []):
+                    continue
+                dbapi.poll()
+                recibidos = []
+                while dbapi.notifies:
+                    recibidos.extend(json.loads(dbapi.notifies.pop(0).payload))
+                _repartir(recibidos, engine)
+        except Exception:
+            time.sleep(5)  # reconectar
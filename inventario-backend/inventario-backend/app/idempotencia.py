@@ -0,0 +1,124 @@
+"""
+Soporte para el header Idempotency-Key en los POST que crean documentos.
+
+Las vistas decoradas no hacen commit: lo hace idempotente, así que el
+documento, la clave, su status y la respuesta se guardan en la misma
+transacción. Un reintento ve la clave solo con su respuesta y la devuelve sin
+volver a tocar el inventario; si la vista falla se descarta todo junto.
+
+Los lotes (postear_lote) confirman por bloque y cada bloque guarda en la clave
+los resultados hasta ahí. Si la solicitud original muere a mitad del lote, un
+reintento con la misma clave después de IDEMPOTENCIA_ESPERA segundos sin
+avance retoma el lote desde el primer documento sin confirmar.
+
+La clave guarda la huella (sha256) del cuerpo: reutilizarla con otro cuerpo
+responde 422 en lugar de devolver la respuesta de un documento distinto.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, make_response, jsonify, current_app, g
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Idempotencia
+
+
+LARGO_CLAVE = Idempotencia.clave.type.length
+
+
+def _en_proceso():
+    return jsonify({'error': 'La solicitud original aún está en proceso'}), 409
+
+
+def _reservar(clave):
+    """Idempotencia de esta solicitud, o la respuesta a devolver si ya se procesó o sigue en curso"""
+    huella = hashlib.sha256(request.get_data()).hexdigest()
+    previa = Idempotencia.query.filter_by(clave=clave, endpoint=request.endpoint).first()
+    if previa is None:
+        registro = Idempotencia(clave=clave, endpoint=request.endpoint, huella=huella)
+        try:
+            with db.session.begin_nested():
+                db.session.add(registro)
+        except IntegrityError:
+            # Otra terminal envió la misma clave al mismo tiempo
+            return _en_proceso()
+        return registro
+
+    if previa.huella is not None and previa.huella != huella:
+        return jsonify({'error': 'La Idempotency-Key ya se usó con otro cuerpo'}), 422
+
+    if previa.status is not None:
+        respuesta = make_response(previa.respuesta, previa.status)
+        respuesta.mimetype = 'application/json'
+        respuesta.headers['Idempotent-Replayed'] = 'true'
+        return respuesta
+
+    # Lote con bloques confirmados que dejó de avanzar: se retoma si nadie más lo tomó
+    limite = datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCIA_ESPERA'])
+    tomada = db.session.execute(
+        update(Idempotencia).where(
+            Idempotencia.id == previa.id, Idempotencia.status == None, Idempotencia.fecha < limite
+        ).values(fecha=datetime.utcnow()).execution_options(synchronize_session=False)
+    ).rowcount
+    if not tomada:
+        db.session.rollback()
+        return _en_proceso()
+    db.session.commit()
+    return previa
+
+
+def idempotente(vista):
+    """Commit de la vista, con reintentos seguros si la solicitud trae Idempotency-Key"""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        clave = request.headers.get('Idempotency-Key')
+        registro = None
+        if clave:
+            if len(clave) > LARGO_CLAVE:
+                return jsonify({'error': f'Idempotency-Key admite hasta {LARGO_CLAVE} caracteres'}), 400
+            registro = _reservar(clave)
+            if not isinstance(registro, Idempotencia):
+                return registro
+            g.idempotencia = registro
+
+        respuesta = make_response(vista(*args, **kwargs))
+
+        if respuesta.status_code >= 400:
+            db.session.rollback()
+            return respuesta
+
+        if registro is not None:
+            registro.status = respuesta.status_code
+            registro.respuesta = respuesta.get_data(as_text=True)
+            registro.fecha = datetime.utcnow()
+        db.session.commit()
+        return respuesta
+
+    return envoltura
+
+
+def resultados_previos():
+    """Resultados ya confirmados del lote si esta solicitud retoma uno con la misma Idempotency-Key"""
+    registro = g.get('idempotencia')
+    if registro is None or not registro.respuesta:
+        return []
+    return json.loads(registro.respuesta)
+
+
+def guardar_avance(resultados):
+    """Anota en la clave los resultados del lote hasta el bloque que se va a confirmar"""
+    registro = g.get('idempotencia')
+    if registro is not None:
+        registro.respuesta = json.dumps(resultados)
+        registro.fecha = datetime.utcnow()
+
+
+def purgar_claves(dias):
+    """Borra las claves con más de `dias` días. Devuelve la cantidad borrada (sin commit)."""
+    limite = datetime.utcnow() - timedelta(days=dias)
+    resultado = db.session.execute(
+        delete(Idempotencia).where(Idempotencia.fecha < limite).execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
@@ -0,0 +1,409 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import (
+    insert, update, delete, select, exists, case, cast, literal, values, column,
+    Integer, String, DateTime, false
+)
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import Producto, MovimientoInventario, Alerta, AlertaArchivada
+from app.agregados import insert_con_conflicto, costo_promedio, costo_sin_compra
+from app.eventos import anotar
+from app.idempotencia import resultados_previos, guardar_avance
+
+
+TIPOS_STOCK = ('stock_bajo', 'stock_critico')
+
+
+class ErrorInventario(ValueError):
+    """El documento no se puede aplicar al inventario (producto inexistente, stock insuficiente)"""
+
+
+def _movimiento(producto_id, tipo, motivo, cantidad, stock_anterior, stock_nuevo, referencia_id, observaciones):
+    return {
+        'producto_id': producto_id,
+        'tipo': tipo,
+        'motivo': motivo,
+        'cantidad': cantidad,
+        'stock_anterior': stock_anterior,
+        'stock_nuevo': stock_nuevo,
+        'referencia_id': referencia_id,
+        'observaciones': observaciones
+    }
+
+
+def _alerta_stock(producto_id, nombre, sku, stock_nuevo, stock_minimo):
+    """Alerta de stock bajo/crítico si el movimiento dejó el producto en o bajo su mínimo"""
+    if stock_nuevo > stock_minimo:
+        return None
+    sin_stock = stock_nuevo <= 0
+    return {
+        'producto_id': producto_id,
+        'tipo': 'stock_critico' if sin_stock else 'stock_bajo',
+        'mensaje': f'{"SIN STOCK" if sin_stock else "Stock bajo"} para {nombre} (SKU: {sku}). Actual: {stock_nuevo}, Mínimo: {stock_minimo}',
+        'producto_nombre': nombre,
+        'producto_sku': sku
+    }
+
+
+def abrir_alertas(alertas):
+    """
+    Registra alertas agrupando por (producto_id, tipo): si el producto ya tiene
+    una pendiente del mismo tipo se actualiza su mensaje y fecha y se suman
+    ocurrencias, en lugar de agregar otra fila (índice único ux_alertas_abiertas).
+    """
+    agrupadas = {}
+    productos = {}
+    for alerta in alertas:
+        clave = (alerta['producto_id'], alerta['tipo'])
+        previa = agrupadas.get(clave)
+        agrupadas[clave] = {
+            'producto_id': alerta['producto_id'],
+            'tipo': alerta['tipo'],
+            'mensaje': alerta['mensaje'],
+            'ocurrencias': (previa['ocurrencias'] if previa else 0) + 1
+        }
+        productos[alerta['producto_id']] = (alerta.get('producto_nombre'), alerta.get('producto_sku'))
+
+    if not agrupadas:
+        return
+
+    # Una sola alerta de stock abierta por producto: la nueva reemplaza a la del otro
+    # tipo (p. ej. stock_critico cierra el stock_bajo que seguía abierto)
+    for tipo in TIPOS_STOCK:
+        ids = [a['producto_id'] for a in agrupadas.values() if a['tipo'] == tipo]
+        if ids:
+            db.session.execute(update(Alerta).where(
+                Alerta.leida == False, Alerta.tipo.in_(TIPOS_STOCK), Alerta.tipo != tipo,
+                Alerta.producto_id.in_(ids)
+            ).values(leida=True).execution_options(synchronize_session=False))
+
+    ahora = datetime.utcnow()
+    sentencia = insert_con_conflicto(Alerta).values([
+        {**a, 'leida': False, 'fecha': ahora} for a in agrupadas.values()
+    ])
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=['producto_id', 'tipo'],
+        index_where=db.text('leida = false'),  # el mismo predicado del índice parcial
+        set_={
+            'mensaje': sentencia.excluded.mensaje,
+            'fecha': sentencia.excluded.fecha,
+            'ocurrencias': Alerta.ocurrencias + sentencia.excluded.ocurrencias
+        }
+    )
+    filas = db.session.execute(sentencia.returning(
+        Alerta.id, Alerta.producto_id, Alerta.tipo, Alerta.mensaje, Alerta.ocurrencias, Alerta.fecha
+    ))
+    # mismo formato que Alerta.to_dict() para que el stream sustituya la fila en el cliente
+    for fila in filas:
+        nombre, sku = productos[fila.producto_id]
+        anotar(db.session, {
+            'evento': 'alerta',
+            'id': fila.id,
+            'producto_id': fila.producto_id,
+            'producto_nombre': nombre,
+            'producto_sku': sku,
+            'tipo': fila.tipo,
+            'mensaje': fila.mensaje,
+            'leida': False,
+            'ocurrencias': fila.ocurrencias,
+            'fecha': fila.fecha.isoformat()
+        })
+
+
+def generar_alertas_stock():
+    """
+    Revisión general de stock: crea las alertas stock_bajo / stock_critico que
+    falten con un único INSERT ... SELECT ... WHERE NOT EXISTS.
+    No crea una alerta si el producto ya tiene una pendiente del mismo tipo, y
+    cierra la pendiente del otro tipo si el producto cambió de estado.
+    Devuelve la cantidad de alertas creadas (sin commit).
+    """
+    sin_stock = Producto.stock_actual <= 0
+    tipo = case((sin_stock, 'stock_critico'), else_='stock_bajo')
+    mensaje = (
+        case((sin_stock, 'SIN STOCK'), else_='Stock bajo')
+        + ' para ' + Producto.nombre + ' (SKU: ' + Producto.sku + ')'
+        + '. Actual: ' + cast(Producto.stock_actual, String)
+        + ', Mínimo: ' + cast(Producto.stock_minimo, String)
+    )
+
+    db.session.execute(update(Alerta).where(
+        Alerta.leida == False,
+        Alerta.tipo.in_(TIPOS_STOCK),
+        exists().where(
+            Producto.id == Alerta.producto_id,
+            Producto.activo == True,
+            Producto.stock_actual <= Producto.stock_minimo,
+            tipo != Alerta.tipo
+        )
+    ).values(leida=True).execution_options(synchronize_session=False))
+
+    pendiente = exists().where(
+        Alerta.producto_id == Producto.id,
+        Alerta.leida == False,
+        Alerta.tipo == tipo
+    )
+
+    faltantes = select(
+        Producto.id, tipo, mensaje, false(), literal(datetime.utcnow(), DateTime)
+    ).where(
+        Producto.activo == True,
+        Producto.stock_actual <= Producto.stock_minimo,
+        ~pendiente
+    )
+
+    # DO NOTHING por si el ledger abrió la misma alerta mientras tanto
+    resultado = db.session.execute(insert_con_conflicto(Alerta).from_select(
+        ['producto_id', 'tipo', 'mensaje', 'leida', 'fecha'], faltantes
+    ).on_conflict_do_nothing())
+    return resultado.rowcount
+
+
+def archivar_alertas(dias):
+    """
+    Mueve a alertas_archivo las alertas leídas con más de `dias` días
+    para que alertas solo conserve lo reciente. Devuelve la cantidad movida (sin commit).
+    """
+    limite = datetime.utcnow() - timedelta(days=dias)
+    viejas = (Alerta.leida == True, Alerta.fecha < limite)
+
+    db.session.execute(insert(AlertaArchivada).from_select(
+        ['id', 'producto_id', 'tipo', 'mensaje', 'fecha', 'ocurrencias', 'archivada'],
+        select(
+            Alerta.id, Alerta.producto_id, Alerta.tipo, Alerta.mensaje, Alerta.fecha,
+            Alerta.ocurrencias, literal(datetime.utcnow(), DateTime)
+        ).where(*viejas)
+    ))
+    resultado = db.session.execute(
+        delete(Alerta).where(*viejas).execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def bloquear_productos(producto_ids):
+    """
+    Bloquea los productos de un documento en un solo SELECT ... FOR UPDATE y
+    devuelve {id: fila} con su nombre, stock y costo. Se bloquean en orden de id
+    para que dos terminales nunca se esperen mutuamente.
+    """
+    ids = sorted(set(producto_ids))
+    filas = db.session.execute(
+        select(Producto.id, Producto.nombre, Producto.stock_actual, Producto.costo_promedio)
+        .where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update()
+    ).all()
+
+    encontrados = {f.id: f for f in filas}
+    for producto_id in ids:
+        if producto_id not in encontrados:
+            raise ErrorInventario(f'Producto {producto_id} no existe')
+
+    return encontrados
+
+
+def aplicar_stock(lineas, tipo, motivo, referencia_id=None, observaciones=None, permitir_negativo=True):
+    """
+    Única escritura de stock. Aplica las líneas [{'producto_id', 'cantidad',
+    'costo_unitario' (compras)}, ...] con un solo
+    WITH v(id, delta) AS (VALUES ...) UPDATE productos ... FROM v RETURNING
+    (stock_actual = stock_actual + delta, sumando productos repetidos) y
+    devuelve las filas de movimientos sin insertarlas. También abre las alertas
+    y anota los eventos de stock.
+    """
+    if not lineas:
+        return []
+    for item in lineas:
+        if not isinstance(item['cantidad'], int) or item['cantidad'] <= 0:
+            raise ErrorInventario(f'Cantidad inválida para el producto {item["producto_id"]}: debe ser mayor que cero')
+    signo = 1 if tipo == 'entrada' else -1
+    productos = bloquear_productos(item['producto_id'] for item in lineas)
+
+    requerido = defaultdict(int)
+    for item in lineas:
+        requerido[item['producto_id']] += item['cantidad']
+
+    if signo < 0 and not permitir_negativo:
+        for producto_id, cantidad in requerido.items():
+            producto = productos[producto_id]
+            if producto.stock_actual < cantidad:
+                raise ErrorInventario(
+                    f'Stock insuficiente para {producto.nombre}. Disponible: {producto.stock_actual}'
+                )
+
+    # Solo las compras cambian el costo promedio, en el orden de sus líneas:
+    # la entrada lo promedia y la salida (reversión de la compra) lo deshace
+    costos = {}
+    if motivo == 'compra':
+        calcular = costo_promedio if signo > 0 else costo_sin_compra
+        existencias = {producto_id: p.stock_actual for producto_id, p in productos.items()}
+        for item in lineas:
+            producto_id = item['producto_id']
+            costos[producto_id] = calcular(
+                existencias[producto_id], costos.get(producto_id, productos[producto_id].costo_promedio),
+                item['cantidad'], item['costo_unitario']
+            )
+            existencias[producto_id] += signo * item['cantidad']
+
+    ahora = datetime.utcnow()
+    columnas = [column('id', Integer), column('delta', Integer)]
+    cambios = {'ultimo_movimiento': ahora}
+    if motivo == 'venta':
+        cambios['ultima_venta'] = ahora
+    if costos:
+        columnas.append(column('costo', Producto.costo_promedio.type))
+    v = values(*columnas, name='v').data([
+        (producto_id, signo * cantidad, *((costos[producto_id],) if costos else ()))
+        for producto_id, cantidad in sorted(requerido.items())
+    ]).cte('v')
+    if costos:
+        cambios['costo_promedio'] = v.c.costo
+
+    filas = db.session.execute(
+        update(Producto).add_cte(v).where(Producto.id == v.c.id)
+        .values(stock_actual=Producto.stock_actual + v.c.delta, **cambios)
+        .returning(Producto.id, Producto.stock_actual, Producto.stock_minimo, Producto.nombre,
+                   Producto.sku, Producto.costo_promedio)
+        .execution_options(synchronize_session=False, solo_stock=True)
+    )
+    actualizados = {f.id: f for f in filas}
+
+    # Stock de cada producto antes del UPDATE, para encadenar las líneas repetidas
+    stock = {producto_id: actualizados[producto_id].stock_actual - signo * cantidad
+             for producto_id, cantidad in requerido.items()}
+    movimientos = []
+    for item in lineas:
+        fila = actualizados[item['producto_id']]
+        stock_anterior = stock[fila.id]
+        stock[fila.id] = stock_anterior + signo * item['cantidad']
+
+        movimientos.append({**_movimiento(
+            fila.id, tipo, motivo, item['cantidad'],
+            stock_anterior, stock[fila.id], referencia_id, observaciones
+        ), 'costo_unitario': item['costo_unitario'] if costos else fila.costo_promedio, 'fecha': ahora})
+
+    # Una alerta por producto, según su stock al final del documento
+    alertas = [_alerta_stock(f.id, f.nombre, f.sku, f.stock_actual, f.stock_minimo) for f in actualizados.values()]
+    abrir_alertas([a for a in alertas if a])
+
+    for m in movimientos:
+        delta = m['stock_nuevo'] - m['stock_anterior']
+        anotar(db.session, {'evento': 'stock', 'producto_id': m['producto_id'], 'stock': m['stock_nuevo'], 'delta': delta})
+
+    return movimientos
+
+
+def registrar_movimientos(lineas, tipo, motivo, referencia_id=None, observaciones=None, permitir_negativo=True):
+    """
+    Movimientos sueltos (cancelaciones, reversiones): aplica las líneas
+    [{'producto_id', 'cantidad', 'costo_unitario' (compras)}, ...] e inserta
+    sus movimientos en bloque.
+    """
+    movimientos = aplicar_stock(lineas, tipo, motivo, referencia_id, observaciones, permitir_negativo)
+    if movimientos:
+        db.session.execute(insert(MovimientoInventario), movimientos)
+    return movimientos
+
+
+def registrar_movimiento(producto_id, tipo, motivo, cantidad, referencia_id=None, observaciones=None,
+                         permitir_negativo=True):
+    """Registra un movimiento (p. ej. un ajuste manual) y lo devuelve como objeto"""
+    fila, = aplicar_stock(
+        [{'producto_id': producto_id, 'cantidad': cantidad}],
+        tipo, motivo, referencia_id, observaciones, permitir_negativo
+    )
+    movimiento = MovimientoInventario(**fila)
+    db.session.add(movimiento)
+    return movimiento
+
+
+def postear_documento(documento, modelo_detalle, lineas, tipo, motivo, observaciones):
+    """
+    Aplica un documento completo (venta, compra, devolución) al inventario:
+    inserta el documento, actualiza el stock de todas sus líneas con
+    aplicar_stock (las salidas no pueden dejar stock negativo) e inserta
+    detalles y movimientos en bloque.
+
+    observaciones admite {id} para el id del documento, p. ej. 'Venta #{id}'
+    """
+    db.session.add(documento)
+    db.session.flush()  # Para obtener el ID
+
+    columnas = modelo_detalle.__table__.c
+    campo_documento = next(c.name for c in columnas if c.references(documento.__table__.c.id))
+
+    detalles = []
+    total = 0
+    for item in lineas:
+        subtotal = item['cantidad'] * item['precio_unitario']
+        total += subtotal
+
+        detalle = {
+            campo_documento: documento.id,
+            'producto_id': item['producto_id'],
+            'cantidad': item['cantidad'],
+            'precio_unitario': item['precio_unitario']
+        }
+        if 'subtotal' in columnas:
+            detalle['subtotal'] = subtotal
+        detalles.append(detalle)
+
+    movimientos = aplicar_stock(
+        [{'producto_id': item['producto_id'], 'cantidad': item['cantidad'], 'costo_unitario': item['precio_unitario']}
+         for item in lineas],
+        tipo, motivo, documento.id, observaciones.format(id=documento.id),
+        permitir_negativo=tipo != 'salida'
+    )
+
+    if detalles:
+        db.session.execute(insert(modelo_detalle), detalles)
+        db.session.execute(insert(MovimientoInventario), movimientos)
+
+    documento.total = total
+    return documento
+
+
+def postear_lote(documentos, postear, tamano_bloque=None):
+    """
+    Procesa muchos documentos (p. ej. tickets acumulados offline en un POS).
+    Cada documento va en su propio savepoint para que un error no descarte
+    a los demás, y se hace un commit por bloque de tamano_bloque documentos.
+    Con Idempotency-Key cada bloque guarda su avance en la clave y un
+    reintento sigue desde el primer documento sin confirmar.
+
+    postear(data) crea y postea un documento y lo devuelve.
+    """
+    if not isinstance(documentos, list):
+        raise ErrorInventario('Se esperaba una lista de documentos')
+
+    tamano_bloque = max(1, tamano_bloque or current_app.config.get('TAMANO_LOTE', 200))
+    resultados = resultados_previos()
+
+    for inicio in range(len(resultados), len(documentos), tamano_bloque):
+        for indice in range(inicio, min(inicio + tamano_bloque, len(documentos))):
+            if not isinstance(documentos[indice], dict):
+                resultados.append({'indice': indice, 'ok': False, 'error': 'Documento inválido'})
+                continue
+            try:
+                with db.session.begin_nested():
+                    documento = postear(documentos[indice])
+                resultados.append({
+                    'indice': indice,
+                    'ok': True,
+                    'id': documento.id,
+                    'total': float(documento.total)
+                })
+            except ErrorInventario as e:
+                resultados.append({'indice': indice, 'ok': False, 'error': str(e)})
+            except (KeyError, TypeError, ValueError, AttributeError, SQLAlchemyError):
+                resultados.append({'indice': indice, 'ok': False, 'error': 'Documento inválido'})
+        guardar_avance(resultados)
+        db.session.commit()
+
+    exitosos = sum(1 for r in resultados if r['ok'])
+    return {
+        'procesados': len(resultados),
+        'exitosos': exitosos,
+        'fallidos': len(resultados) - exitosos,
+        'resultados': resultados
+    }
@@ -0,0 +1,178 @@
+"""
+Métricas por ruta en formato Prometheus (/api/metrics) y log de solicitudes lentas.
+
+Por cada solicitud se mide la latencia, cuántas sentencias SQL ejecutó y su
+tiempo (listeners before/after_cursor_execute) y cuántas filas se serializaron.
+Las métricas son del proceso: con varios workers de gunicorn cada uno lleva las suyas.
+
+Una solicitud que tarda más de METRICAS_LENTA_MS se registra en el log con sus
+sentencias más costosas agrupadas por texto; una misma sentencia repetida muchas
+veces suele ser una carga N+1 en algún to_dict().
+"""
+import threading
+import time
+from collections import defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_SENTENCIAS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+_lock = threading.Lock()
+_solicitudes = defaultdict(int)  # (método, ruta, status) -> cantidad
+_latencia = {}  # (método, ruta) -> histograma
+_sentencias = {}  # (método, ruta) -> histograma de sentencias por solicitud
+_tiempo_db = defaultdict(float)  # (método, ruta) -> segundos
+_filas = defaultdict(int)  # (método, ruta) -> filas serializadas
+
+
+class _Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * len(buckets)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.conteos[i] += 1
+        self.suma += valor
+        self.total += 1
+
+
+def anotar_filas(cantidad):
+    """Filas que la solicitud actual devolvió en el JSON (lo llama ProveedorJSON)"""
+    if has_request_context() and 'metricas' in g:
+        g.metricas['filas'] += cantidad
+
+
+# El inicio va en el contexto de ejecución de cada sentencia y no en la conexión:
+# si la sentencia falla no hay after_cursor_execute y no queda nada sin sacar
+def _antes_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+    if contexto is not None:
+        contexto.metricas_inicio = time.perf_counter()
+
+
+def _despues_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+    inicio = getattr(contexto, 'metricas_inicio', None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    if has_request_context() and 'metricas' in g:
+        g.metricas['sentencias'].append((duracion, sentencia))
+
+
+def _ruta():
+    regla = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    return request.method, regla
+
+
+def _registrar(app, respuesta):
+    datos = g.pop('metricas', None)
+    if datos is None:
+        return
+    duracion = time.perf_counter() - datos['inicio']
+    sentencias = datos['sentencias']
+    tiempo_db = sum(d for d, _ in sentencias)
+    clave = _ruta()
+
+    with _lock:
+        _solicitudes[(*clave, respuesta.status_code)] += 1
+        _latencia.setdefault(clave, _Histograma(BUCKETS_SEGUNDOS)).observar(duracion)
+        _sentencias.setdefault(clave, _Histograma(BUCKETS_SENTENCIAS)).observar(len(sentencias))
+        _tiempo_db[clave] += tiempo_db
+        _filas[clave] += datos['filas']
+
+    if duracion * 1000 >= app.config.get('METRICAS_LENTA_MS', 500):
+        _log_lenta(app, clave, duracion, tiempo_db, sentencias)
+
+
+def _log_lenta(app, clave, duracion, tiempo_db, sentencias):
+    agrupadas = defaultdict(lambda: [0, 0.0])
+    for d, sentencia in sentencias:
+        agrupadas[sentencia][0] += 1
+        agrupadas[sentencia][1] += d
+    top = sorted(agrupadas.items(), key=lambda item: item[1][1], reverse=True)[:5]
+    detalle = '\n'.join(
+        f'  {veces}x {total * 1000:.1f} ms  {" ".join(sentencia.split())[:200]}'
+        for sentencia, (veces, total) in top
+    )
+    app.logger.warning(
+        'Solicitud lenta %s %s: %.0f ms, %d sentencias, %.0f ms en la base\n%s',
+        *clave, duracion * 1000, len(sentencias), tiempo_db * 1000, detalle
+    )
+
+
+def _etiquetas(**valores):
+    partes = []
+    for nombre, valor in valores.items():
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"')
+        partes.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+def _histograma(lineas, nombre, datos):
+    for (metodo, ruta), h in sorted(datos.items()):
+        for limite, conteo in zip(h.buckets, h.conteos):
+            lineas.append(f'{nombre}_bucket{_etiquetas(method=metodo, route=ruta, le=limite)} {conteo}')
+        lineas.append(f'{nombre}_bucket{_etiquetas(method=metodo, route=ruta, le="+Inf")} {h.total}')
+        lineas.append(f'{nombre}_sum{_etiquetas(method=metodo, route=ruta)} {h.suma}')
+        lineas.append(f'{nombre}_count{_etiquetas(method=metodo, route=ruta)} {h.total}')
+
+
+def exportar():
+    """Texto en formato de exposición de Prometheus"""
+    from app.conexiones import estado_pool
+
+    lineas = []
+    with _lock:
+        lineas += ['# HELP inventario_http_requests_total Solicitudes atendidas',
+                   '# TYPE inventario_http_requests_total counter']
+        for (metodo, ruta, status), n in sorted(_solicitudes.items()):
+            lineas.append(f'inventario_http_requests_total{_etiquetas(method=metodo, route=ruta, status=status)} {n}')
+
+        lineas += ['# HELP inventario_http_request_duration_seconds Latencia por ruta',
+                   '# TYPE inventario_http_request_duration_seconds histogram']
+        _histograma(lineas, 'inventario_http_request_duration_seconds', _latencia)
+
+        lineas += ['# HELP inventario_db_statements_per_request Sentencias SQL por solicitud',
+                   '# TYPE inventario_db_statements_per_request histogram']
+        _histograma(lineas, 'inventario_db_statements_per_request', _sentencias)
+
+        lineas += ['# HELP inventario_db_seconds_total Tiempo en la base por ruta',
+                   '# TYPE inventario_db_seconds_total counter']
+        for (metodo, ruta), s in sorted(_tiempo_db.items()):
+            lineas.append(f'inventario_db_seconds_total{_etiquetas(method=metodo, route=ruta)} {s}')
+
+        lineas += ['# HELP inventario_rows_serialized_total Filas devueltas en JSON por ruta',
+                   '# TYPE inventario_rows_serialized_total counter']
+        for (metodo, ruta), n in sorted(_filas.items()):
+            lineas.append(f'inventario_rows_serialized_total{_etiquetas(method=metodo, route=ruta)} {n}')
+
+    for nombre, valor in estado_pool().items():
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            tipo = 'counter' if nombre in ('checkouts', 'checkouts_saturado', 'timeouts_pool', 'timeouts_sentencia') else 'gauge'
+            sufijo = '_total' if tipo == 'counter' else ''
+            lineas += [f'# TYPE inventario_db_pool_{nombre}{sufijo} {tipo}', f'inventario_db_pool_{nombre}{sufijo} {valor}']
+
+    return '\n'.join(lineas) + '\n'
+
+
+def configurar_metricas(app):
+    """Hooks de solicitud y listeners de cursor para los motores de la app"""
+    from app import db
+
+    with app.app_context():
+        for motor in db.engines.values():
+            event.listen(motor, 'before_cursor_execute', _antes_de_sentencia)
+            event.listen(motor, 'after_cursor_execute', _despues_de_sentencia)
+
+    @app.before_request
+    def _iniciar():
+        g.metricas = {'inicio': time.perf_counter(), 'sentencias': [], 'filas': 0}
+
+    @app.after_request
+    def _terminar(respuesta):
+        _registrar(app, respuesta)
+        return respuesta
@@ -0,0 +1,98 @@
+"""
+Migraciones de esquema versionadas.
+
+Cada módulo vNNNN_nombre.py define aplicar(conn) y se registra en MIGRACIONES.
+migrar() aplica en orden las que falten y anota cada una en versiones_esquema.
+Las migraciones deben poder correr sobre una base creada antes con db.create_all().
+Cada una declara sus propias tablas, columnas e índices en lugar de tomarlos de
+app.models, para que el DDL que aplica no cambie cuando cambian los modelos.
+"""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, select, insert, inspect, text
+from app import db
+from app.migraciones import (
+    v0001_esquema_inicial, v0002_indices, v0003_alertas_agrupadas, v0004_versiones_tablas,
+    v0005_busqueda_productos, v0006_ultimos_movimientos, v0007_costo_promedio,
+    v0008_stock_diario, v0009_reversiones_compra, v0010_idempotencia_fecha, v0011_idempotencia_huella,
+    v0012_stock_inicial
+)
+
+MIGRACIONES = [
+    v0001_esquema_inicial,
+    v0002_indices,
+    v0003_alertas_agrupadas,
+    v0004_versiones_tablas,
+    v0005_busqueda_productos,
+    v0006_ultimos_movimientos,
+    v0007_costo_promedio,
+    v0008_stock_diario,
+    v0009_reversiones_compra,
+    v0010_idempotencia_fecha,
+    v0011_idempotencia_huella,
+    v0012_stock_inicial,
+]
+
+versiones = Table(
+    'versiones_esquema', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('nombre', String(100), nullable=False),
+    Column('fecha', DateTime, nullable=False)
+)
+
+
+def _version(modulo):
+    return int(modulo.__name__.rsplit('.', 1)[-1].split('_', 1)[0][1:])
+
+
+def migrar(engine=None):
+    """Aplica las migraciones pendientes; devuelve los nombres de las aplicadas"""
+    engine = engine or db.engine
+    aplicadas = []
+
+    with engine.begin() as conn:
+        # Evita que dos procesos migren a la vez
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text('SELECT pg_advisory_xact_lock(727100)'))
+
+        versiones.create(conn, checkfirst=True)
+        hechas = set(conn.execute(select(versiones.c.version)).scalars())
+
+        for modulo in MIGRACIONES:
+            version = _version(modulo)
+            if version in hechas:
+                continue
+            nombre = modulo.__name__.rsplit('.', 1)[-1]
+            modulo.aplicar(conn)
+            conn.execute(insert(versiones).values(version=version, nombre=nombre, fecha=datetime.utcnow()))
+            aplicadas.append(nombre)
+
+    return aplicadas
+
+
+def pendientes(engine=None):
+    """Nombres de las migraciones que faltan aplicar"""
+    engine = engine or db.engine
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(versiones.name):
+            hechas = set()
+        else:
+            hechas = set(conn.execute(select(versiones.c.version)).scalars())
+    return [m.__name__.rsplit('.', 1)[-1] for m in MIGRACIONES if _version(m) not in hechas]
+
+
+def crear_indices(conn, *indices):
+    """CREATE INDEX solo si no existe"""
+    for indice in indices:
+        indice.create(conn, checkfirst=True)
+
+
+def agregar_columna(conn, tabla, columna):
+    """ALTER TABLE ... ADD COLUMN solo si la columna no existe"""
+    existentes = {c['name'] for c in inspect(conn).get_columns(tabla.name)}
+    if columna.name not in existentes:
+        ddl = f'ALTER TABLE {tabla.name} ADD COLUMN {columna.name} {columna.type.compile(dialect=conn.dialect)}'
+        if columna.server_default is not None:
+            ddl += f' DEFAULT {columna.server_default.arg}'
+            if not columna.nullable:
+                ddl += ' NOT NULL'
+        conn.execute(text(ddl))
@@ -0,0 +1,156 @@
+"""
+Esquema congelado tal como estaba antes del sistema de migraciones. No usa
+app.models: los cambios posteriores a los modelos van en migraciones nuevas.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, ForeignKey, UniqueConstraint,
+    Integer, String, Text, Boolean, Numeric, DateTime, Date
+)
+
+metadata = MetaData()
+
+Table(
+    'categorias', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre', String(100), nullable=False),
+    Column('activo', Boolean)
+)
+
+Table(
+    'proveedores', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre', String(200), nullable=False),
+    Column('telefono', String(20)),
+    Column('email', String(100)),
+    Column('activo', Boolean)
+)
+
+Table(
+    'clientes', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('nombre', String(200), nullable=False),
+    Column('nit', String(20)),
+    Column('telefono', String(20)),
+    Column('email', String(100)),
+    Column('tipo', String(20)),
+    Column('activo', Boolean)
+)
+
+Table(
+    'productos', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('sku', String(50), unique=True, nullable=False),
+    Column('nombre', String(200), nullable=False),
+    Column('categoria_id', Integer, ForeignKey('categorias.id')),
+    Column('precio_compra', Numeric(10, 2)),
+    Column('precio_venta', Numeric(10, 2), nullable=False),
+    Column('stock_actual', Integer),
+    Column('stock_minimo', Integer),
+    Column('activo', Boolean)
+)
+
+Table(
+    'movimientos_inventario', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id'), nullable=False),
+    Column('tipo', String(20), nullable=False),
+    Column('motivo', String(30), nullable=False),
+    Column('cantidad', Integer, nullable=False),
+    Column('stock_anterior', Integer, nullable=False),
+    Column('stock_nuevo', Integer, nullable=False),
+    Column('referencia_id', Integer),
+    Column('observaciones', Text),
+    Column('fecha', DateTime)
+)
+
+Table(
+    'compras', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('proveedor_id', Integer, ForeignKey('proveedores.id'), nullable=False),
+    Column('numero_documento', String(50)),
+    Column('total', Numeric(10, 2)),
+    Column('fecha', DateTime)
+)
+
+Table(
+    'compras_detalle', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('compra_id', Integer, ForeignKey('compras.id', ondelete='CASCADE'), nullable=False),
+    Column('producto_id', Integer, ForeignKey('productos.id'), nullable=False),
+    Column('cantidad', Integer, nullable=False),
+    Column('precio_unitario', Numeric(10, 2), nullable=False),
+    Column('subtotal', Numeric(10, 2), nullable=False)
+)
+
+Table(
+    'ventas', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('cliente_id', Integer, ForeignKey('clientes.id')),
+    Column('punto_venta', String(20)),
+    Column('total', Numeric(10, 2)),
+    Column('fecha', DateTime)
+)
+
+Table(
+    'ventas_detalle', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('venta_id', Integer, ForeignKey('ventas.id', ondelete='CASCADE'), nullable=False),
+    Column('producto_id', Integer, ForeignKey('productos.id'), nullable=False),
+    Column('cantidad', Integer, nullable=False),
+    Column('precio_unitario', Numeric(10, 2), nullable=False),
+    Column('subtotal', Numeric(10, 2), nullable=False)
+)
+
+Table(
+    'devoluciones', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('tipo', String(20), nullable=False),
+    Column('referencia_id', Integer),
+    Column('motivo', Text, nullable=False),
+    Column('total', Numeric(10, 2)),
+    Column('fecha', DateTime)
+)
+
+Table(
+    'devoluciones_detalle', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('devolucion_id', Integer, ForeignKey('devoluciones.id', ondelete='CASCADE'), nullable=False),
+    Column('producto_id', Integer, ForeignKey('productos.id'), nullable=False),
+    Column('cantidad', Integer, nullable=False),
+    Column('precio_unitario', Numeric(10, 2), nullable=False)
+)
+
+Table(
+    'alertas', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id')),
+    Column('tipo', String(30), nullable=False),
+    Column('mensaje', Text, nullable=False),
+    Column('leida', Boolean),
+    Column('fecha', DateTime)
+)
+
+Table(
+    'idempotencia', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('clave', String(100), nullable=False),
+    Column('endpoint', String(100), nullable=False),
+    Column('status', Integer),
+    Column('respuesta', Text),
+    Column('fecha', DateTime),
+    UniqueConstraint('clave', 'endpoint')
+)
+
+Table(
+    'ventas_diarias', metadata,
+    Column('dia', Date, primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id'), primary_key=True),
+    Column('cantidad', Integer, nullable=False),
+    Column('ingresos', Numeric(12, 2), nullable=False),
+    Column('num_ventas', Integer, nullable=False)
+)
+
+
+def aplicar(conn):
+    """Tablas existentes antes del sistema de migraciones (antes: db.create_all() en run.py)"""
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,48 @@
+from sqlalchemy import MetaData, Table, Column, Index, text
+
+metadata = MetaData()
+
+
+def _tabla(nombre, *columnas):
+    """Solo las columnas que usan los índices; el tipo no interviene en CREATE INDEX"""
+    return Table(nombre, metadata, *(Column(c) for c in columnas))
+
+
+productos = _tabla('productos', 'categoria_id')
+movimientos = _tabla('movimientos_inventario', 'producto_id', 'tipo', 'motivo', 'fecha')
+compras = _tabla('compras', 'id', 'proveedor_id', 'fecha')
+compras_detalle = _tabla('compras_detalle', 'compra_id', 'producto_id')
+ventas = _tabla('ventas', 'id', 'cliente_id', 'punto_venta', 'fecha')
+ventas_detalle = _tabla('ventas_detalle', 'venta_id', 'producto_id')
+devoluciones = _tabla('devoluciones', 'id', 'fecha')
+devoluciones_detalle = _tabla('devoluciones_detalle', 'devolucion_id', 'producto_id')
+alertas = _tabla('alertas', 'id', 'leida', 'tipo', 'fecha')
+
+INDICES = [
+    Index('ix_productos_categoria', productos.c.categoria_id),
+    Index('ix_movimientos_fecha', movimientos.c.fecha),
+    Index('ix_movimientos_producto_fecha', movimientos.c.producto_id, movimientos.c.fecha),
+    Index('ix_movimientos_tipo_motivo_fecha', movimientos.c.tipo, movimientos.c.motivo, movimientos.c.fecha),
+    Index('ix_compras_fecha_id', compras.c.fecha, compras.c.id),
+    Index('ix_compras_proveedor_fecha', compras.c.proveedor_id, compras.c.fecha),
+    Index('ix_compras_detalle_compra', compras_detalle.c.compra_id),
+    Index('ix_compras_detalle_producto', compras_detalle.c.producto_id),
+    Index('ix_ventas_fecha_id', ventas.c.fecha, ventas.c.id),
+    Index('ix_ventas_cliente_fecha', ventas.c.cliente_id, ventas.c.fecha),
+    Index('ix_ventas_punto_venta_fecha', ventas.c.punto_venta, ventas.c.fecha),
+    Index('ix_ventas_detalle_venta', ventas_detalle.c.venta_id),
+    Index('ix_ventas_detalle_producto', ventas_detalle.c.producto_id),
+    Index('ix_devoluciones_fecha_id', devoluciones.c.fecha, devoluciones.c.id),
+    Index('ix_devoluciones_detalle_devolucion', devoluciones_detalle.c.devolucion_id),
+    Index('ix_devoluciones_detalle_producto', devoluciones_detalle.c.producto_id),
+    Index('ix_alertas_pendientes_fecha', alertas.c.fecha, alertas.c.id,
+          postgresql_where=text('leida = false'), sqlite_where=text('leida = false')),
+    Index('ix_alertas_leida_tipo_fecha', alertas.c.leida, alertas.c.tipo, alertas.c.fecha),
+]
+
+
+def aplicar(conn):
+    """Índices para los filtros y órdenes de los listados y reportes"""
+    from app.migraciones import crear_indices
+
+    crear_indices(conn, *INDICES)
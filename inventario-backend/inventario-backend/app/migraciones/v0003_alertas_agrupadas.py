@@ -0,0 +1,51 @@
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, Text, DateTime, text
+
+metadata = MetaData()
+
+alertas = Table(
+    'alertas', metadata,
+    Column('producto_id', Integer),
+    Column('tipo', String(30)),
+    Column('ocurrencias', Integer, nullable=False, server_default='1')
+)
+
+alertas_archivo = Table(
+    'alertas_archivo', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('producto_id', Integer),
+    Column('tipo', String(30), nullable=False),
+    Column('mensaje', Text, nullable=False),
+    Column('fecha', DateTime),
+    Column('ocurrencias', Integer, nullable=False),
+    Column('archivada', DateTime)
+)
+
+alertas_abiertas = Index(
+    'ux_alertas_abiertas', alertas.c.producto_id, alertas.c.tipo, unique=True,
+    postgresql_where=text('leida = false'), sqlite_where=text('leida = false')
+)
+
+
+def aplicar(conn):
+    """Alertas agrupadas por (producto_id, tipo) con contador de ocurrencias, y archivo de alertas"""
+    from app.migraciones import agregar_columna, crear_indices
+
+    agregar_columna(conn, alertas, alertas.c.ocurrencias)
+    alertas_archivo.create(conn, checkfirst=True)
+
+    # Antes de crear el índice único, dejar una sola alerta pendiente por producto y tipo
+    conn.execute(text("""
+        UPDATE alertas SET ocurrencias = (
+            SELECT count(*) FROM alertas a2
+            WHERE a2.leida = false AND a2.producto_id = alertas.producto_id AND a2.tipo = alertas.tipo
+        )
+        WHERE leida = false
+    """))
+    conn.execute(text("""
+        UPDATE alertas SET leida = true
+        WHERE leida = false AND id NOT IN (
+            SELECT max(id) FROM alertas WHERE leida = false GROUP BY producto_id, tipo
+        )
+    """))
+
+    crear_indices(conn, alertas_abiertas)
@@ -0,0 +1,13 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime
+
+versiones_tablas = Table(
+    'versiones_tablas', MetaData(),
+    Column('tabla', String(50), primary_key=True),
+    Column('version', Integer, nullable=False),
+    Column('modificada', DateTime, nullable=False)
+)
+
+
+def aplicar(conn):
+    """Contadores de versión por tabla para los ETag de los catálogos"""
+    versiones_tablas.create(conn, checkfirst=True)
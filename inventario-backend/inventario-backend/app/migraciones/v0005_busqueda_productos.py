@@ -0,0 +1,21 @@
+from sqlalchemy import MetaData, Table, Column, Index, String, text
+
+productos = Table('productos', MetaData(), Column('sku', String(50)), Column('nombre', String(200)))
+
+INDICES = [
+    Index('ix_productos_sku_trgm', productos.c.sku, postgresql_using='gin',
+          postgresql_ops={'sku': 'gin_trgm_ops'}),
+    Index('ix_productos_nombre_trgm', productos.c.nombre, postgresql_using='gin',
+          postgresql_ops={'nombre': 'gin_trgm_ops'}),
+]
+
+
+def aplicar(conn):
+    """Índices de trigramas para /api/productos/buscar (solo PostgreSQL)"""
+    from app.migraciones import crear_indices
+
+    if conn.dialect.name != 'postgresql':
+        return
+
+    conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    crear_indices(conn, *INDICES)
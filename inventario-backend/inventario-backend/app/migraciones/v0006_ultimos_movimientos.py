@@ -0,0 +1,17 @@
+from sqlalchemy import MetaData, Table, Column, DateTime
+
+productos = Table(
+    'productos', MetaData(),
+    Column('ultimo_movimiento', DateTime),
+    Column('ultima_venta', DateTime)
+)
+
+
+def aplicar(conn):
+    """Fecha del último movimiento y de la última venta en productos (reporte de menos rotación)"""
+    from app.agregados import reconstruir_ultimos_movimientos
+    from app.migraciones import agregar_columna
+
+    agregar_columna(conn, productos, productos.c.ultimo_movimiento)
+    agregar_columna(conn, productos, productos.c.ultima_venta)
+    reconstruir_ultimos_movimientos(conexion=conn)
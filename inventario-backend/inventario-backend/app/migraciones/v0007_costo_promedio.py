@@ -0,0 +1,25 @@
+from sqlalchemy import MetaData, Table, Column, Numeric, text
+
+metadata = MetaData()
+productos = Table('productos', metadata, Column('costo_promedio', Numeric(12, 4), nullable=False, server_default='0'))
+movimientos = Table('movimientos_inventario', metadata, Column('costo_unitario', Numeric(12, 4)))
+
+
+def aplicar(conn):
+    """Costo promedio ponderado por producto y costo unitario en el kardex"""
+    from app.agregados import reconstruir_costos
+    from app.migraciones import agregar_columna
+
+    agregar_columna(conn, productos, productos.c.costo_promedio)
+    agregar_columna(conn, movimientos, movimientos.c.costo_unitario)
+
+    # Costo de las entradas por compra ya registradas (promedio si el producto se repite en la compra)
+    conn.execute(text("""
+        UPDATE movimientos_inventario SET costo_unitario = (
+            SELECT sum(d.subtotal) / sum(d.cantidad) FROM compras_detalle d
+            WHERE d.compra_id = movimientos_inventario.referencia_id
+              AND d.producto_id = movimientos_inventario.producto_id
+        )
+        WHERE motivo = 'compra' AND costo_unitario IS NULL
+    """))
+    reconstruir_costos(conexion=conn)
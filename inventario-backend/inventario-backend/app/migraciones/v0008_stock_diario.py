@@ -0,0 +1,15 @@
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Integer, Date
+
+metadata = MetaData()
+Table('productos', metadata, Column('id', Integer, primary_key=True))
+stock_diario = Table(
+    'stock_diario', metadata,
+    Column('dia', Date, primary_key=True),
+    Column('producto_id', Integer, ForeignKey('productos.id'), primary_key=True),
+    Column('stock', Integer, nullable=False)
+)
+
+
+def aplicar(conn):
+    """Cierres diarios de stock para /api/reportes/stock?fecha="""
+    stock_diario.create(conn, checkfirst=True)
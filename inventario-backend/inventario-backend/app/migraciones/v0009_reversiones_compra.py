@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+
+def aplicar(conn):
+    """Las reversiones de compra pasan a salidas por compra con el costo de la compra revertida"""
+    from app.agregados import reconstruir_costos
+
+    conn.execute(text("""
+        UPDATE movimientos_inventario SET motivo = 'compra', costo_unitario = (
+            SELECT max(e.costo_unitario) FROM movimientos_inventario e
+            WHERE e.tipo = 'entrada' AND e.motivo = 'compra'
+              AND e.referencia_id = movimientos_inventario.referencia_id
+              AND e.producto_id = movimientos_inventario.producto_id
+        )
+        WHERE tipo = 'salida' AND motivo = 'ajuste' AND observaciones LIKE 'Reversión de compra #%'
+    """))
+    reconstruir_costos(conexion=conn)
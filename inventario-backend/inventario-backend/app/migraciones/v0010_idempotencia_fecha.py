@@ -0,0 +1,10 @@
+from sqlalchemy import MetaData, Table, Column, Index, DateTime
+
+idempotencia = Table('idempotencia', MetaData(), Column('fecha', DateTime))
+
+
+def aplicar(conn):
+    """Índice por fecha en idempotencia para purgar las claves antiguas"""
+    from app.migraciones import crear_indices
+
+    crear_indices(conn, Index('ix_idempotencia_fecha', idempotencia.c.fecha))
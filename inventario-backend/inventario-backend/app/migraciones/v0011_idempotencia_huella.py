@@ -0,0 +1,9 @@
+from sqlalchemy import MetaData, Table, Column, String
+
+
+def aplicar(conn):
+    """Huella del cuerpo en idempotencia, para rechazar una clave reutilizada con otro documento"""
+    from app.migraciones import agregar_columna
+
+    idempotencia = Table('idempotencia', MetaData())
+    agregar_columna(conn, idempotencia, Column('huella', String(64)))
@@ -0,0 +1,54 @@
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, DateTime, Date, select, insert, func, case
+)
+
+metadata = MetaData()
+productos = Table('productos', metadata, Column('id', Integer), Column('stock_actual', Integer))
+movimientos = Table(
+    'movimientos_inventario', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('producto_id', Integer),
+    Column('tipo', String(20)),
+    Column('motivo', String(30)),
+    Column('cantidad', Integer),
+    Column('stock_anterior', Integer),
+    Column('stock_nuevo', Integer),
+    Column('observaciones', Text),
+    Column('fecha', DateTime)
+)
+stock_diario = Table('stock_diario', metadata, Column('dia', Date))
+
+
+def aplicar(conn):
+    """
+    Movimiento de stock inicial para los productos cuyo stock no sale del kardex
+    (creados con stock antes de que create_producto lo registrara). Se fecha en
+    el inicio del historial para que stock_historico siga dando lo mismo que antes.
+    """
+    delta = case((movimientos.c.tipo == 'entrada', movimientos.c.cantidad), else_=-movimientos.c.cantidad)
+    sumas = select(movimientos.c.producto_id, func.sum(delta).label('delta')).group_by(
+        movimientos.c.producto_id
+    ).subquery()
+    faltante = func.coalesce(productos.c.stock_actual, 0) - func.coalesce(sumas.c.delta, 0)
+    filas = conn.execute(
+        select(productos.c.id, faltante.label('faltante')).outerjoin(
+            sumas, sumas.c.producto_id == productos.c.id
+        ).where(faltante != 0)
+    ).all()
+    if not filas:
+        return
+
+    inicios = [
+        conn.execute(select(func.min(movimientos.c.fecha))).scalar(),
+        conn.execute(select(func.min(stock_diario.c.dia))).scalar(),
+    ]
+    inicios = [datetime.combine(i, datetime.min.time()) if not isinstance(i, datetime) else i
+               for i in inicios if i is not None]
+    fecha = min(inicios, default=datetime.utcnow())
+
+    conn.execute(insert(movimientos), [{
+        'producto_id': f.id, 'tipo': 'entrada' if f.faltante > 0 else 'salida', 'motivo': 'ajuste',
+        'cantidad': abs(f.faltante), 'stock_anterior': 0, 'stock_nuevo': f.faltante,
+        'observaciones': 'Stock inicial', 'fecha': fecha
+    } for f in filas])
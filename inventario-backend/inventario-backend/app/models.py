@@ -1,5 +1,18 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def _columna_de(modelo, columna, fk):
+    """Columna de la fila relacionada como subconsulta escalar (para campos())"""
+    return select(columna).where(modelo.id == fk).scalar_subquery()
+
+
+def _costo_inicial(contexto):
+    """El stock que no vino de una compra se valora a precio_compra (igual que reconstruir_costos)"""
+    return contexto.get_current_parameters().get('precio_compra') or 0
+
 
 class Categoria(db.Model):
     __tablename__ = 'categorias'
@@ -66,6 +79,14 @@ class Cliente(db.Model):
 
 class Producto(db.Model):
     __tablename__ = 'productos'
+    __table_args__ = (
+        db.Index('ix_productos_categoria', 'categoria_id'),
+        # Búsqueda /api/productos/buscar: ILIKE y similitud por trigramas (extensión pg_trgm)
+        db.Index('ix_productos_sku_trgm', 'sku', postgresql_using='gin',
+                 postgresql_ops={'sku': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_productos_nombre_trgm', 'nombre', postgresql_using='gin',
+                 postgresql_ops={'nombre': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     sku = db.Column(db.String(50), unique=True, nullable=False)
@@ -76,9 +97,27 @@ class Producto(db.Model):
     stock_actual = db.Column(db.Integer, default=0)
     stock_minimo = db.Column(db.Integer, default=5)
     activo = db.Column(db.Boolean, default=True)
+    # Los mantiene el posteo de inventario (reporte de menos rotación)
+    ultimo_movimiento = db.Column(db.DateTime)
+    ultima_venta = db.Column(db.DateTime)
+    # Costo promedio ponderado de las compras (valorización del inventario), parte de precio_compra
+    costo_promedio = db.Column(db.Numeric(12, 4), nullable=False, default=_costo_inicial, server_default='0')
     
     movimientos = db.relationship('MovimientoInventario', backref='producto', lazy=True)
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (joinedload(cls.categoria),)
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {
+            'categoria_nombre': _columna_de(Categoria, Categoria.nombre, cls.categoria_id),
+            'precio_compra': func.coalesce(cls.precio_compra, 0)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -86,28 +125,54 @@ class Producto(db.Model):
             'nombre': self.nombre,
             'categoria_id': self.categoria_id,
             'categoria_nombre': self.categoria.nombre if self.categoria else None,
-            'precio_compra': float(self.precio_compra) if self.precio_compra else 0,
-            'precio_venta': float(self.precio_venta),
+            'precio_compra': self.precio_compra or 0,
+            'precio_venta': self.precio_venta,
+            'costo_promedio': self.costo_promedio,
             'stock_actual': self.stock_actual,
             'stock_minimo': self.stock_minimo,
             'activo': self.activo
         }
 
 
+db.event.listen(
+    Producto.__table__, 'before_create',
+    db.DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
 class MovimientoInventario(db.Model):
     __tablename__ = 'movimientos_inventario'
+    __table_args__ = (
+        db.Index('ix_movimientos_fecha', 'fecha'),
+        db.Index('ix_movimientos_producto_fecha', 'producto_id', 'fecha'),
+        db.Index('ix_movimientos_tipo_motivo_fecha', 'tipo', 'motivo', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False)
     tipo = db.Column(db.String(20), nullable=False)  # entrada, salida
-    motivo = db.Column(db.String(30), nullable=False)  # compra, venta, devolucion, ajuste
+    motivo = db.Column(db.String(30), nullable=False)  # compra, venta, devolucion, ajuste; salida por compra = reversión de la compra
     cantidad = db.Column(db.Integer, nullable=False)
     stock_anterior = db.Column(db.Integer, nullable=False)
     stock_nuevo = db.Column(db.Integer, nullable=False)
     referencia_id = db.Column(db.Integer)
     observaciones = db.Column(db.Text)
+    costo_unitario = db.Column(db.Numeric(12, 4))  # de la compra, o el costo promedio del momento
     fecha = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (joinedload(cls.producto),)
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {
+            'producto_nombre': _columna_de(Producto, Producto.nombre, cls.producto_id),
+            'producto_sku': _columna_de(Producto, Producto.sku, cls.producto_id)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -121,12 +186,17 @@ class MovimientoInventario(db.Model):
             'stock_nuevo': self.stock_nuevo,
             'referencia_id': self.referencia_id,
             'observaciones': self.observaciones,
-            'fecha': self.fecha.isoformat() if self.fecha else None
+            'costo_unitario': self.costo_unitario,
+            'fecha': self.fecha
         }
 
 
 class Compra(db.Model):
     __tablename__ = 'compras'
+    __table_args__ = (
+        db.Index('ix_compras_fecha_id', 'fecha', 'id'),
+        db.Index('ix_compras_proveedor_fecha', 'proveedor_id', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     proveedor_id = db.Column(db.Integer, db.ForeignKey('proveedores.id'), nullable=False)
@@ -136,20 +206,40 @@ class Compra(db.Model):
     
     detalles = db.relationship('CompraDetalle', backref='compra', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (
+            joinedload(cls.proveedor),
+            selectinload(cls.detalles).joinedload(CompraDetalle.producto)
+        )
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {
+            'proveedor_nombre': _columna_de(Proveedor, Proveedor.nombre, cls.proveedor_id),
+            'total': func.coalesce(cls.total, 0)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
             'proveedor_id': self.proveedor_id,
             'proveedor_nombre': self.proveedor.nombre if self.proveedor else None,
             'numero_documento': self.numero_documento,
-            'total': float(self.total) if self.total else 0,
-            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'total': self.total or 0,
+            'fecha': self.fecha,
             'detalles': [d.to_dict() for d in self.detalles]
         }
 
 
 class CompraDetalle(db.Model):
     __tablename__ = 'compras_detalle'
+    __table_args__ = (
+        db.Index('ix_compras_detalle_compra', 'compra_id'),
+        db.Index('ix_compras_detalle_producto', 'producto_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     compra_id = db.Column(db.Integer, db.ForeignKey('compras.id', ondelete='CASCADE'), nullable=False)
@@ -168,13 +258,18 @@ class CompraDetalle(db.Model):
             'producto_nombre': self.producto.nombre if self.producto else None,
             'producto_sku': self.producto.sku if self.producto else None,
             'cantidad': self.cantidad,
-            'precio_unitario': float(self.precio_unitario),
-            'subtotal': float(self.subtotal)
+            'precio_unitario': self.precio_unitario,
+            'subtotal': self.subtotal
         }
 
 
 class Venta(db.Model):
     __tablename__ = 'ventas'
+    __table_args__ = (
+        db.Index('ix_ventas_fecha_id', 'fecha', 'id'),
+        db.Index('ix_ventas_cliente_fecha', 'cliente_id', 'fecha'),
+        db.Index('ix_ventas_punto_venta_fecha', 'punto_venta', 'fecha'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'))
@@ -184,20 +279,42 @@ class Venta(db.Model):
     
     detalles = db.relationship('VentaDetalle', backref='venta', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (
+            joinedload(cls.cliente),
+            selectinload(cls.detalles).joinedload(VentaDetalle.producto)
+        )
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {
+            'cliente_nombre': func.coalesce(
+                _columna_de(Cliente, Cliente.nombre, cls.cliente_id), 'Consumidor Final'
+            ),
+            'total': func.coalesce(cls.total, 0)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
             'cliente_id': self.cliente_id,
             'cliente_nombre': self.cliente.nombre if self.cliente else 'Consumidor Final',
             'punto_venta': self.punto_venta,
-            'total': float(self.total) if self.total else 0,
-            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'total': self.total or 0,
+            'fecha': self.fecha,
             'detalles': [d.to_dict() for d in self.detalles]
         }
 
 
 class VentaDetalle(db.Model):
     __tablename__ = 'ventas_detalle'
+    __table_args__ = (
+        db.Index('ix_ventas_detalle_venta', 'venta_id'),
+        db.Index('ix_ventas_detalle_producto', 'producto_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     venta_id = db.Column(db.Integer, db.ForeignKey('ventas.id', ondelete='CASCADE'), nullable=False)
@@ -216,13 +333,16 @@ class VentaDetalle(db.Model):
             'producto_nombre': self.producto.nombre if self.producto else None,
             'producto_sku': self.producto.sku if self.producto else None,
             'cantidad': self.cantidad,
-            'precio_unitario': float(self.precio_unitario),
-            'subtotal': float(self.subtotal)
+            'precio_unitario': self.precio_unitario,
+            'subtotal': self.subtotal
         }
 
 
 class Devolucion(db.Model):
     __tablename__ = 'devoluciones'
+    __table_args__ = (
+        db.Index('ix_devoluciones_fecha_id', 'fecha', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(20), nullable=False)  # cliente, proveedor
@@ -233,20 +353,34 @@ class Devolucion(db.Model):
     
     detalles = db.relationship('DevolucionDetalle', backref='devolucion', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (selectinload(cls.detalles).joinedload(DevolucionDetalle.producto),)
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {'total': func.coalesce(cls.total, 0)}
+    
     def to_dict(self):
         return {
             'id': self.id,
             'tipo': self.tipo,
             'referencia_id': self.referencia_id,
             'motivo': self.motivo,
-            'total': float(self.total) if self.total else 0,
-            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'total': self.total or 0,
+            'fecha': self.fecha,
             'detalles': [d.to_dict() for d in self.detalles]
         }
 
 
 class DevolucionDetalle(db.Model):
     __tablename__ = 'devoluciones_detalle'
+    __table_args__ = (
+        db.Index('ix_devoluciones_detalle_devolucion', 'devolucion_id'),
+        db.Index('ix_devoluciones_detalle_producto', 'producto_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     devolucion_id = db.Column(db.Integer, db.ForeignKey('devoluciones.id', ondelete='CASCADE'), nullable=False)
@@ -263,22 +397,45 @@ class DevolucionDetalle(db.Model):
             'producto_id': self.producto_id,
             'producto_nombre': self.producto.nombre if self.producto else None,
             'cantidad': self.cantidad,
-            'precio_unitario': float(self.precio_unitario)
+            'precio_unitario': self.precio_unitario
         }
 
 
 class Alerta(db.Model):
     __tablename__ = 'alertas'
+    __table_args__ = (
+        # Parcial: el listado y el contador solo leen alertas pendientes
+        db.Index('ix_alertas_pendientes_fecha', 'fecha', 'id',
+                 postgresql_where=db.text('leida = false'), sqlite_where=db.text('leida = false')),
+        db.Index('ix_alertas_leida_tipo_fecha', 'leida', 'tipo', 'fecha'),
+        # Una sola alerta pendiente por producto y tipo; las repeticiones suman ocurrencias
+        db.Index('ux_alertas_abiertas', 'producto_id', 'tipo', unique=True,
+                 postgresql_where=db.text('leida = false'), sqlite_where=db.text('leida = false')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'))
     tipo = db.Column(db.String(30), nullable=False)
     mensaje = db.Column(db.Text, nullable=False)
     leida = db.Column(db.Boolean, default=False)
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)  # última ocurrencia
+    ocurrencias = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     producto = db.relationship('Producto')
     
+    @classmethod
+    def opciones_carga(cls):
+        """Relaciones que usa to_dict(), cargadas junto al listado"""
+        return (joinedload(cls.producto),)
+    
+    @classmethod
+    def campos(cls):
+        """Claves de to_dict() que no salen tal cual de una columna propia, como expresiones SQL (?fields=)"""
+        return {
+            'producto_nombre': _columna_de(Producto, Producto.nombre, cls.producto_id),
+            'producto_sku': _columna_de(Producto, Producto.sku, cls.producto_id)
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -288,5 +445,64 @@ class Alerta(db.Model):
             'tipo': self.tipo,
             'mensaje': self.mensaje,
             'leida': self.leida,
-            'fecha': self.fecha.isoformat() if self.fecha else None
+            'ocurrencias': self.ocurrencias,
+            'fecha': self.fecha
         }
+
+
+# Alertas leídas movidas fuera de la tabla alertas por el comando archivar-alertas
+class AlertaArchivada(db.Model):
+    __tablename__ = 'alertas_archivo'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer)
+    tipo = db.Column(db.String(30), nullable=False)
+    mensaje = db.Column(db.Text, nullable=False)
+    fecha = db.Column(db.DateTime)
+    ocurrencias = db.Column(db.Integer, nullable=False, default=1)
+    archivada = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Idempotencia(db.Model):
+    __tablename__ = 'idempotencia'
+    __table_args__ = (
+        db.UniqueConstraint('clave', 'endpoint'),
+        db.Index('ix_idempotencia_fecha', 'fecha'),  # purgar-idempotencia
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(100), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    huella = db.Column(db.String(64))  # sha256 del cuerpo: la clave no se reutiliza con otro documento
+    status = db.Column(db.Integer)  # NULL mientras la solicitud original está en proceso
+    respuesta = db.Column(db.Text)  # en un lote sin terminar, los resultados de los bloques confirmados
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)  # último avance
+
+
+# Acumulado de ventas por día y producto, se mantiene al crear o cancelar ventas
+class VentaDiaria(db.Model):
+    __tablename__ = 'ventas_diarias'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    num_ventas = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Stock de cierre por día (solo productos con stock distinto de 0); lo escribe flask cerrar-stock-diario
+class StockDiario(db.Model):
+    __tablename__ = 'stock_diario'
+    
+    dia = db.Column(db.Date, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
+
+
+# Versión de cada tabla de catálogo, se incrementa en cada commit que la modifica (ETag)
+class VersionTabla(db.Model):
+    __tablename__ = 'versiones_tablas'
+    
+    tabla = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    modificada = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+from app.campos import seleccionar
+
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+
+class CursorInvalido(ValueError):
+    """El parámetro ?after= no corresponde a un cursor emitido por la API"""
+
+
+def solicita_cursor():
+    """True si el cliente pidió el modo paginado (?limit= o ?after=)"""
+    return 'limit' in request.args or 'after' in request.args
+
+
+def _codificar_cursor(valores):
+    crudo = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in valores])
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, columnas):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if len(valores) != len(columnas):
+            raise CursorInvalido(cursor)
+        return [
+            datetime.fromisoformat(v) if c.type.python_type is datetime else c.type.python_type(v)
+            for c, v in zip(columnas, valores)
+        ]
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise CursorInvalido(cursor)
+
+
+def paginar(query, columnas, descendente=True):
+    """
+    Paginación por cursor (keyset) sobre las columnas dadas, p. ej. (fecha, id).
+    La última columna debe ser única para que el orden sea estable.
+    Respeta ?fields= (ver app.campos).
+
+    Devuelve {'items': [...], 'next_cursor': str | None}
+    """
+    limit = request.args.get('limit', LIMITE_DEFECTO, type=int)
+    limit = max(1, min(limit, LIMITE_MAXIMO))
+    after = request.args.get('after')
+
+    clave = tuple_(*columnas)
+    if after:
+        valores = _decodificar_cursor(after, columnas)
+        query = query.filter(clave < tuple_(*valores) if descendente else clave > tuple_(*valores))
+
+    query, a_dict = seleccionar(query, extra=columnas)
+    orden = [c.desc() if descendente else c.asc() for c in columnas]
+    filas = query.order_by(None).order_by(*orden).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        next_cursor = _codificar_cursor([getattr(ultima, c.key) for c in columnas])
+
+    return {
+        'items': [a_dict(f) for f in filas],
+        'next_cursor': next_cursor
+    }
@@ -0,0 +1,90 @@
+"""
+Lecturas en una réplica de la base (opcional: REPLICA_DATABASE_URL).
+
+Los GET de REPLICA_BLUEPRINTS consultan la réplica (bind 'replica'); todo lo
+demás, incluidas las respuestas de los POST como create_venta, usa la primaria.
+Se vuelve a la primaria si:
+- la réplica está atrasada más de REPLICA_RETRASO_MAXIMO segundos o no responde
+  (se revisa cada REPLICA_CHEQUEO segundos por proceso), o
+- el cliente escribió hace menos de REPLICA_VENTANA_ESCRITURA segundos (cookie),
+  para que vea sus propios cambios.
+"""
+import threading
+import time
+from flask import current_app, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+COOKIE_ESCRITURA = 'ultima_escritura'
+
+# 0 si la réplica aplicó todo lo recibido; si no, antigüedad de la última transacción aplicada
+SQL_RETRASO = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+_lock = threading.Lock()
+_estado = {}  # motor -> (disponible, revisar_despues_de)
+
+
+class SesionEnrutada(Session):
+    """db.session: usa el motor de lectura que eligió la solicitud, si hay uno"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        motor = self.info.get('motor_lectura')
+        if bind is None and motor is not None:
+            return motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _retraso(motor):
+    with motor.connect() as conexion:
+        if conexion.dialect.name != 'postgresql':
+            return 0.0
+        return float(conexion.execute(text(SQL_RETRASO)).scalar() or 0)
+
+
+def replica_disponible():
+    """Motor de la réplica si está configurada y al día, o None"""
+    motor = current_app.extensions['sqlalchemy'].engines.get('replica')
+    if motor is None:
+        return None
+
+    ahora = time.monotonic()
+    with _lock:
+        disponible, revisar = _estado.get(motor, (False, 0))
+    if ahora >= revisar:
+        try:
+            disponible = _retraso(motor) <= current_app.config['REPLICA_RETRASO_MAXIMO']
+        except SQLAlchemyError:
+            disponible = False
+        with _lock:
+            _estado[motor] = (disponible, ahora + current_app.config['REPLICA_CHEQUEO'])
+
+    return motor if disponible else None
+
+
+def configurar_replica(app):
+    """Enrutamiento de lecturas; no hace nada si no hay REPLICA_DATABASE_URL"""
+    if 'replica' not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    sesion = app.extensions['sqlalchemy'].session
+
+    @app.before_request
+    def _elegir_motor():
+        if (request.method == 'GET'
+                and request.blueprint in app.config['REPLICA_BLUEPRINTS']
+                and COOKIE_ESCRITURA not in request.cookies):
+            motor = replica_disponible()
+            if motor is not None:
+                sesion.info['motor_lectura'] = motor
+
+    @app.after_request
+    def _recordar_escritura(respuesta):
+        if request.method in ('POST', 'PUT', 'DELETE') and respuesta.status_code < 400:
+            respuesta.set_cookie(
+                COOKIE_ESCRITURA, str(int(time.time())),
+                max_age=app.config['REPLICA_VENTANA_ESCRITURA'], httponly=True, samesite='Lax'
+            )
+        return respuesta
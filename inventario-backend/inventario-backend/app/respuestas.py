@@ -0,0 +1,115 @@
+"""
+Serialización JSON y compresión de las respuestas.
+
+- ProveedorJSON usa orjson si está instalado (json de la librería estándar si no)
+  y convierte Decimal y datetime al serializar, así los to_dict() devuelven
+  los valores de la base tal cual.
+- Las respuestas grandes se comprimen con br (si está instalado brotli) o gzip
+  según Accept-Encoding.
+"""
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from app.metricas import anotar_filas
+
+try:
+    import orjson
+except ImportError:  # opcional: pip install orjson
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # opcional: pip install brotli
+    brotli = None
+
+COMPRIMIBLES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain'}
+
+
+def _por_defecto(o):
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class ProveedorJSON(DefaultJSONProvider):
+    """app.json: jsonify() y los dict que devuelven las vistas pasan por aquí"""
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj, indent=kwargs.get('indent')).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def _dumps(self, obj, indent=None):
+        if orjson is not None:
+            opciones = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                opciones |= orjson.OPT_SORT_KEYS
+            if indent:
+                opciones |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_por_defecto, option=opciones)
+        return json.dumps(
+            obj, default=_por_defecto, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+            indent=indent, separators=None if indent else (',', ':')
+        ).encode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if isinstance(obj, list):
+            anotar_filas(len(obj))
+        elif isinstance(obj, dict) and isinstance(obj.get('items'), list):
+            anotar_filas(len(obj['items']))  # página de paginar()
+        legible = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps(obj, indent=2 if legible else None) + b'\n', mimetype=self.mimetype
+        )
+
+
+def _codificacion():
+    """br o gzip según Accept-Encoding del cliente (None si no acepta ninguna)"""
+    aceptadas = request.accept_encodings
+    if brotli is not None and aceptadas['br']:
+        return 'br'
+    if aceptadas['gzip']:
+        return 'gzip'
+    return None
+
+
+def comprimir(respuesta, minimo):
+    """Comprime la respuesta si el cliente lo acepta y el cuerpo pasa de `minimo` bytes"""
+    if (respuesta.direct_passthrough or respuesta.is_streamed
+            or respuesta.status_code < 200 or respuesta.status_code in (204, 304)
+            or 'Content-Encoding' in respuesta.headers
+            or respuesta.mimetype not in COMPRIMIBLES):
+        return respuesta
+
+    respuesta.vary.add('Accept-Encoding')
+    codificacion = _codificacion()
+    if codificacion is None or respuesta.content_length is None or respuesta.content_length < minimo:
+        return respuesta
+
+    datos = respuesta.get_data()
+    if codificacion == 'br':
+        datos = brotli.compress(datos, quality=4)
+    else:
+        datos = gzip.compress(datos, compresslevel=6)
+
+    respuesta.set_data(datos)
+    respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+
+def configurar_respuestas(app):
+    """Instala ProveedorJSON y la compresión en la app"""
+    app.json = ProveedorJSON(app)
+
+    @app.after_request
+    def _comprimir(respuesta):
+        return comprimir(respuesta, app.config.get('COMPRESION_MINIMA', 1024))
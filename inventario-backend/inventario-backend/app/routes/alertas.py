@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify
-from app import db
-from app.models import Alerta, Producto
+import json
+import queue
+from flask import Blueprint, Response, request, jsonify
+from app import db, inventario, eventos
+from app.models import Alerta
+from app.paginacion import solicita_cursor, paginar
+from app.campos import seleccionar
 
 alertas_bp = Blueprint('alertas', __name__)
 
@@ -10,15 +14,18 @@ def get_alertas():
     solo_pendientes = request.args.get('pendientes', 'true').lower() == 'true'
     tipo = request.args.get('tipo')
     
-    query = Alerta.query
+    query = Alerta.query.options(*Alerta.opciones_carga())
     
     if solo_pendientes:
         query = query.filter_by(leida=False)
     if tipo:
         query = query.filter_by(tipo=tipo)
     
-    alertas = query.order_by(Alerta.fecha.desc()).all()
-    return jsonify([a.to_dict() for a in alertas])
+    if solicita_cursor():
+        return jsonify(paginar(query, (Alerta.fecha, Alerta.id)))
+    
+    query, a_dict = seleccionar(query.order_by(Alerta.fecha.desc()))
+    return jsonify([a_dict(a) for a in query.all()])
 
 
 @alertas_bp.route('/count', methods=['GET'])
@@ -28,6 +35,38 @@ def get_alertas_count():
     return jsonify({'pendientes': count})
 
 
+@alertas_bp.route('/stream', methods=['GET'])
+def stream_alertas():
+    """
+    Server-Sent Events: alertas nuevas (alerta), contador de pendientes (alertas)
+    y cambios de stock por producto (stock). El stream no usa conexiones a la base.
+    """
+    cola = eventos.suscribir(db.engine)
+    pendientes = Alerta.query.filter_by(leida=False).count()
+
+    def generar():
+        try:
+            yield 'retry: 3000\n\n'
+            yield _sse({'evento': 'alertas', 'pendientes': pendientes})
+            while True:
+                try:
+                    yield _sse(cola.get(timeout=15))
+                except queue.Empty:
+                    yield ': ping\n\n'  # mantiene viva la conexión a través de proxies
+        finally:
+            eventos.desuscribir(cola)
+
+    return Response(generar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def _sse(evento):
+    datos = {k: v for k, v in evento.items() if k != 'evento'}
+    return f"event: {evento['evento']}\ndata: {json.dumps(datos)}\n\n"
+
+
 @alertas_bp.route('/<int:id>/leer', methods=['PUT'])
 def marcar_leida(id):
     """Marcar alerta como leída"""
@@ -49,32 +88,8 @@ def marcar_todas_leidas():
 
 @alertas_bp.route('/generar-stock-bajo', methods=['POST'])
 def generar_alertas_stock():
-    """Revisar todos los productos y generar alertas de stock bajo"""
-    productos = Producto.query.filter(
-        Producto.activo == True,
-        Producto.stock_actual <= Producto.stock_minimo
-    ).all()
-    
-    alertas_creadas = 0
-    
-    for producto in productos:
-        # Verificar si ya existe alerta pendiente
-        existe = Alerta.query.filter_by(
-            producto_id=producto.id,
-            leida=False,
-            tipo='stock_bajo'
-        ).first()
-        
-        if not existe:
-            tipo = 'stock_critico' if producto.stock_actual == 0 else 'stock_bajo'
-            alerta = Alerta(
-                producto_id=producto.id,
-                tipo=tipo,
-                mensaje=f'{"SIN STOCK" if producto.stock_actual == 0 else "Stock bajo"} para {producto.nombre} (SKU: {producto.sku}). Actual: {producto.stock_actual}, Mínimo: {producto.stock_minimo}'
-            )
-            db.session.add(alerta)
-            alertas_creadas += 1
-    
+    """Revisar todos los productos y generar alertas de stock bajo (también: flask generar-alertas-stock)"""
+    alertas_creadas = inventario.generar_alertas_stock()
     db.session.commit()
     
     return jsonify({
@@ -1,17 +1,21 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Categoria
+from app.versiones import condicional
+from app.campos import seleccionar
 
 categorias_bp = Blueprint('categorias', __name__)
 
 # GET - Listar todas
 @categorias_bp.route('', methods=['GET'])
+@condicional('categorias')
 def get_categorias():
-    categorias = Categoria.query.filter_by(activo=True).all()
-    return jsonify([c.to_dict() for c in categorias])
+    query, a_dict = seleccionar(Categoria.query.filter_by(activo=True))
+    return jsonify([a_dict(c) for c in query.all()])
 
 # GET - Obtener una
 @categorias_bp.route('/<int:id>', methods=['GET'])
+@condicional('categorias')
 def get_categoria(id):
     categoria = Categoria.query.get_or_404(id)
     return jsonify(categoria.to_dict())
@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Cliente
+from app.paginacion import solicita_cursor, paginar
+from app.versiones import condicional
+from app.campos import seleccionar
 
 clientes_bp = Blueprint('clientes', __name__)
 
 @clientes_bp.route('', methods=['GET'])
+@condicional('clientes')
 def get_clientes():
     tipo = request.args.get('tipo')  # filtrar por tipo: minorista, corporativo
     
@@ -12,10 +16,14 @@ def get_clientes():
     if tipo:
         query = query.filter_by(tipo=tipo)
     
-    clientes = query.all()
-    return jsonify([c.to_dict() for c in clientes])
+    if solicita_cursor():
+        return jsonify(paginar(query, (Cliente.id,), descendente=False))
+    
+    query, a_dict = seleccionar(query)
+    return jsonify([a_dict(c) for c in query.all()])
 
 @clientes_bp.route('/<int:id>', methods=['GET'])
+@condicional('clientes')
 def get_cliente(id):
     cliente = Cliente.query.get_or_404(id)
     return jsonify(cliente.to_dict())
@@ -1,55 +1,20 @@
 from flask import Blueprint, request, jsonify
 from app import db
-from app.models import Compra, CompraDetalle, Producto, MovimientoInventario, Alerta
-from datetime import datetime
+from app.models import Compra, CompraDetalle
+from app.paginacion import solicita_cursor, paginar
+from app.inventario import postear_documento, postear_lote, registrar_movimientos
+from app.idempotencia import idempotente
+from app.campos import seleccionar
 
 compras_bp = Blueprint('compras', __name__)
 
-def registrar_movimiento(producto_id, tipo, motivo, cantidad, referencia_id=None, observaciones=None):
-    """Registra movimiento y actualiza stock"""
-    producto = Producto.query.get(producto_id)
-    stock_anterior = producto.stock_actual
-    
-    if tipo == 'entrada':
-        stock_nuevo = stock_anterior + cantidad
-    else:
-        stock_nuevo = stock_anterior - cantidad
-    
-    # Actualizar stock
-    producto.stock_actual = stock_nuevo
-    
-    # Crear movimiento
-    movimiento = MovimientoInventario(
-        producto_id=producto_id,
-        tipo=tipo,
-        motivo=motivo,
-        cantidad=cantidad,
-        stock_anterior=stock_anterior,
-        stock_nuevo=stock_nuevo,
-        referencia_id=referencia_id,
-        observaciones=observaciones
-    )
-    db.session.add(movimiento)
-    
-    # Verificar alerta de stock bajo
-    if stock_nuevo <= producto.stock_minimo:
-        alerta = Alerta(
-            producto_id=producto_id,
-            tipo='stock_bajo',
-            mensaje=f'Stock bajo para {producto.nombre} (SKU: {producto.sku}). Actual: {stock_nuevo}, Mínimo: {producto.stock_minimo}'
-        )
-        db.session.add(alerta)
-    
-    return movimiento
-
-
 @compras_bp.route('', methods=['GET'])
 def get_compras():
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     proveedor_id = request.args.get('proveedor_id', type=int)
     
-    query = Compra.query
+    query = Compra.query.options(*Compra.opciones_carga())
     
     if proveedor_id:
         query = query.filter_by(proveedor_id=proveedor_id)
@@ -58,17 +23,21 @@ def get_compras():
     if fecha_hasta:
         query = query.filter(Compra.fecha <= fecha_hasta)
     
-    compras = query.order_by(Compra.fecha.desc()).all()
-    return jsonify([c.to_dict() for c in compras])
+    if solicita_cursor():
+        return jsonify(paginar(query, (Compra.fecha, Compra.id)))
+    
+    query, a_dict = seleccionar(query.order_by(Compra.fecha.desc()))
+    return jsonify([a_dict(c) for c in query.all()])
 
 
 @compras_bp.route('/<int:id>', methods=['GET'])
 def get_compra(id):
-    compra = Compra.query.get_or_404(id)
+    compra = Compra.query.options(*Compra.opciones_carga()).get_or_404(id)
     return jsonify(compra.to_dict())
 
 
 @compras_bp.route('', methods=['POST'])
+@idempotente
 def create_compra():
     """
     Crear compra y registrar entrada de inventario automáticamente
@@ -83,46 +52,41 @@ def create_compra():
         ]
     }
     """
-    data = request.get_json()
+    compra = postear_compra(request.get_json())
     
-    # Crear compra
+    # El commit lo hace idempotente, junto con la respuesta
+    compra = db.session.get(Compra, compra.id, options=Compra.opciones_carga(), populate_existing=True)
+    return jsonify(compra.to_dict()), 201
+
+
+@compras_bp.route('/batch', methods=['POST'])
+@idempotente
+def create_compras_batch():
+    """
+    Carga masiva de compras
+    
+    Body esperado: lista de compras con el mismo formato de POST /api/compras.
+    Query opcional: ?bloque=500 documentos por commit.
+    Devuelve el resultado de cada compra por su índice en la lista.
+    """
+    bloque = request.args.get('bloque', type=int)
+    return jsonify(postear_lote(request.get_json(), postear_compra, bloque))
+
+
+def postear_compra(data):
+    """Crea la compra y registra la entrada de inventario (sin commit)"""
     compra = Compra(
         proveedor_id=data['proveedor_id'],
         numero_documento=data.get('numero_documento')
     )
-    db.session.add(compra)
-    db.session.flush()  # Para obtener el ID
-    
-    total = 0
     
-    # Procesar detalles
-    for item in data['detalles']:
-        subtotal = item['cantidad'] * item['precio_unitario']
-        total += subtotal
-        
-        detalle = CompraDetalle(
-            compra_id=compra.id,
-            producto_id=item['producto_id'],
-            cantidad=item['cantidad'],
-            precio_unitario=item['precio_unitario'],
-            subtotal=subtotal
-        )
-        db.session.add(detalle)
-        
-        # Registrar entrada de inventario
-        registrar_movimiento(
-            producto_id=item['producto_id'],
-            tipo='entrada',
-            motivo='compra',
-            cantidad=item['cantidad'],
-            referencia_id=compra.id,
-            observaciones=f'Compra #{compra.id}'
-        )
-    
-    compra.total = total
-    db.session.commit()
-    
-    return jsonify(compra.to_dict()), 201
+    # Registra la entrada de inventario y guarda detalles en bloque
+    return postear_documento(
+        compra, CompraDetalle, data['detalles'],
+        tipo='entrada',
+        motivo='compra',
+        observaciones='Compra #{id}'
+    )
 
 
 @compras_bp.route('/<int:id>', methods=['DELETE'])
@@ -130,16 +94,15 @@ def delete_compra(id):
     """Eliminar compra (solo si es reciente y revierte el inventario)"""
     compra = Compra.query.get_or_404(id)
     
-    # Revertir movimientos de inventario
-    for detalle in compra.detalles:
-        registrar_movimiento(
-            producto_id=detalle.producto_id,
-            tipo='salida',
-            motivo='ajuste',
-            cantidad=detalle.cantidad,
-            referencia_id=compra.id,
-            observaciones=f'Reversión de compra #{compra.id}'
-        )
+    # Revertir movimientos de inventario; la salida por compra también deshace el costo promedio
+    registrar_movimientos(
+        [{'producto_id': d.producto_id, 'cantidad': d.cantidad, 'costo_unitario': d.precio_unitario}
+         for d in compra.detalles],
+        tipo='salida',
+        motivo='compra',
+        referencia_id=compra.id,
+        observaciones=f'Reversión de compra #{compra.id}'
+    )
     
     db.session.delete(compra)
     db.session.commit()
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app import db
-from app.models import MovimientoInventario, Producto, Alerta
+from app.models import MovimientoInventario
+from app.inventario import registrar_movimiento
+from app.idempotencia import idempotente
+from app.campos import seleccionar
 
 movimientos_bp = Blueprint('movimientos', __name__)
 
@@ -14,7 +17,7 @@ def get_movimientos():
     fecha_hasta = request.args.get('fecha_hasta')
     limit = request.args.get('limit', 100, type=int)
     
-    query = MovimientoInventario.query
+    query = MovimientoInventario.query.options(*MovimientoInventario.opciones_carga())
     
     if producto_id:
         query = query.filter_by(producto_id=producto_id)
@@ -27,17 +30,18 @@ def get_movimientos():
     if fecha_hasta:
         query = query.filter(MovimientoInventario.fecha <= fecha_hasta)
     
-    movimientos = query.order_by(MovimientoInventario.fecha.desc()).limit(limit).all()
-    return jsonify([m.to_dict() for m in movimientos])
+    query, a_dict = seleccionar(query.order_by(MovimientoInventario.fecha.desc()).limit(limit))
+    return jsonify([a_dict(m) for m in query.all()])
 
 
 @movimientos_bp.route('/<int:id>', methods=['GET'])
 def get_movimiento(id):
-    movimiento = MovimientoInventario.query.get_or_404(id)
+    movimiento = MovimientoInventario.query.options(*MovimientoInventario.opciones_carga()).get_or_404(id)
     return jsonify(movimiento.to_dict())
 
 
 @movimientos_bp.route('/ajuste', methods=['POST'])
+@idempotente
 def crear_ajuste():
     """
     Crear ajuste manual de inventario
@@ -52,38 +56,15 @@ def crear_ajuste():
     """
     data = request.get_json()
     
-    producto = Producto.query.get_or_404(data['producto_id'])
-    stock_anterior = producto.stock_actual
-    
-    if data['tipo'] == 'entrada':
-        stock_nuevo = stock_anterior + data['cantidad']
-    else:
-        stock_nuevo = stock_anterior - data['cantidad']
-        if stock_nuevo < 0:
-            return jsonify({'error': 'Stock insuficiente para el ajuste'}), 400
-    
-    producto.stock_actual = stock_nuevo
-    
-    movimiento = MovimientoInventario(
+    # Un ajuste de salida no puede dejar el stock en negativo
+    movimiento = registrar_movimiento(
         producto_id=data['producto_id'],
         tipo=data['tipo'],
         motivo='ajuste',
         cantidad=data['cantidad'],
-        stock_anterior=stock_anterior,
-        stock_nuevo=stock_nuevo,
-        observaciones=data.get('observaciones', 'Ajuste manual')
+        observaciones=data.get('observaciones', 'Ajuste manual'),
+        permitir_negativo=False
     )
-    db.session.add(movimiento)
-    
-    # Alerta de stock bajo
-    if stock_nuevo <= producto.stock_minimo:
-        alerta = Alerta(
-            producto_id=producto.id,
-            tipo='stock_bajo',
-            mensaje=f'Stock bajo para {producto.nombre}. Actual: {stock_nuevo}'
-        )
-        db.session.add(alerta)
-    
-    db.session.commit()
+    db.session.flush()  # el commit lo hace idempotente, junto con la respuesta
     
     return jsonify(movimiento.to_dict()), 201
@@ -1,15 +1,22 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select, case, func, or_
 from app import db
 from app.models import Producto, Categoria
+from app.agregados import reconstruir_costos
+from app.inventario import registrar_movimiento
+from app.paginacion import solicita_cursor, paginar
+from app.versiones import condicional
+from app.campos import seleccionar
 
 productos_bp = Blueprint('productos', __name__)
 
 @productos_bp.route('', methods=['GET'])
+@condicional('productos', 'categorias', 'stock')
 def get_productos():
     categoria_id = request.args.get('categoria_id', type=int)
     stock_bajo = request.args.get('stock_bajo', type=bool)
     
-    query = Producto.query.filter_by(activo=True)
+    query = Producto.query.options(*Producto.opciones_carga()).filter_by(activo=True)
     
     if categoria_id:
         query = query.filter_by(categoria_id=categoria_id)
@@ -17,15 +24,59 @@ def get_productos():
     if stock_bajo:
         query = query.filter(Producto.stock_actual <= Producto.stock_minimo)
     
-    productos = query.all()
-    return jsonify([p.to_dict() for p in productos])
+    if solicita_cursor():
+        return jsonify(paginar(query, (Producto.id,), descendente=False))
+    
+    query, a_dict = seleccionar(query)
+    return jsonify([a_dict(p) for p in query.all()])
+
+BUSQUEDA_LIMITE = 20
+BUSQUEDA_LIMITE_MAXIMO = 100
+
+@productos_bp.route('/buscar', methods=['GET'])
+@condicional('productos', 'stock')
+def buscar_productos():
+    """
+    Búsqueda para los formularios (typeahead): prefijo de SKU o parte del nombre,
+    y en PostgreSQL también nombres parecidos (pg_trgm). Solo devuelve lo que usa el formulario.
+    """
+    q = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', BUSQUEDA_LIMITE, type=int), BUSQUEDA_LIMITE_MAXIMO))
+    if not q:
+        return jsonify([])
+
+    patron = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    por_sku = Producto.sku.ilike(patron + '%', escape='\\')
+    condiciones = [por_sku, Producto.nombre.ilike('%' + patron + '%', escape='\\')]
+    orden = [case((por_sku, 0), else_=1)]
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        # nombre %> q: alguna palabra del nombre se parece a q (usa ix_productos_nombre_trgm)
+        condiciones.append(Producto.nombre.op('%>')(q))
+        orden.append(func.word_similarity(q, Producto.nombre).desc())
+
+    filas = db.session.execute(
+        select(Producto.id, Producto.sku, Producto.nombre, Producto.precio_venta, Producto.stock_actual)
+        .where(Producto.activo == True, or_(*condiciones))
+        .order_by(*orden, Producto.nombre, Producto.id)
+        .limit(limit)
+    )
+    return jsonify([{
+        'id': f.id,
+        'sku': f.sku,
+        'nombre': f.nombre,
+        'precio_venta': f.precio_venta,
+        'stock_actual': f.stock_actual
+    } for f in filas])
 
 @productos_bp.route('/<int:id>', methods=['GET'])
+@condicional('productos', 'categorias', 'stock')
 def get_producto(id):
     producto = Producto.query.get_or_404(id)
     return jsonify(producto.to_dict())
 
 @productos_bp.route('/sku/<sku>', methods=['GET'])
+@condicional('productos', 'categorias', 'stock')
 def get_producto_by_sku(sku):
     producto = Producto.query.filter_by(sku=sku, activo=True).first_or_404()
     return jsonify(producto.to_dict())
@@ -44,11 +95,18 @@ def create_producto():
         categoria_id=data.get('categoria_id'),
         precio_compra=data.get('precio_compra', 0),
         precio_venta=data['precio_venta'],
-        stock_actual=data.get('stock_actual', 0),
+        stock_actual=0,
         stock_minimo=data.get('stock_minimo', 5)
     )
     
     db.session.add(producto)
+    db.session.flush()
+    
+    # El stock inicial entra por el kardex, como cualquier otro cambio de stock
+    inicial = data.get('stock_actual', 0)
+    if inicial:
+        registrar_movimiento(producto.id, 'entrada' if inicial > 0 else 'salida', 'ajuste',
+                             abs(inicial), observaciones='Stock inicial')
     db.session.commit()
     
     return jsonify(producto.to_dict()), 201
@@ -64,6 +122,9 @@ def update_producto(id):
             return jsonify({'error': 'SKU ya existe'}), 400
         producto.sku = data['sku']
     
+    # El costo promedio parte de precio_compra: si cambia, se recalcula desde las compras
+    recalcular_costo = 'precio_compra' in data and data['precio_compra'] != producto.precio_compra
+    
     producto.nombre = data.get('nombre', producto.nombre)
     producto.categoria_id = data.get('categoria_id', producto.categoria_id)
     producto.precio_compra = data.get('precio_compra', producto.precio_compra)
@@ -71,6 +132,9 @@ def update_producto(id):
     producto.stock_minimo = data.get('stock_minimo', producto.stock_minimo)
     producto.activo = data.get('activo', producto.activo)
     
+    if recalcular_costo:
+        db.session.flush()
+        reconstruir_costos(producto_ids=[producto.id])
     db.session.commit()
     
     return jsonify(producto.to_dict())
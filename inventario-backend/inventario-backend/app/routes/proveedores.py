@@ -1,15 +1,19 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Proveedor
+from app.versiones import condicional
+from app.campos import seleccionar
 
 proveedores_bp = Blueprint('proveedores', __name__)
 
 @proveedores_bp.route('', methods=['GET'])
+@condicional('proveedores')
 def get_proveedores():
-    proveedores = Proveedor.query.filter_by(activo=True).all()
-    return jsonify([p.to_dict() for p in proveedores])
+    query, a_dict = seleccionar(Proveedor.query.filter_by(activo=True))
+    return jsonify([a_dict(p) for p in query.all()])
 
 @proveedores_bp.route('/<int:id>', methods=['GET'])
+@condicional('proveedores')
 def get_proveedor(id):
     proveedor = Proveedor.query.get_or_404(id)
     return jsonify(proveedor.to_dict())
@@ -1,34 +1,78 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app import db
-from app.models import Producto, Categoria, MovimientoInventario, Venta, VentaDetalle
-from sqlalchemy import func, desc
+from app.models import Producto, Categoria, MovimientoInventario, Venta, VentaDiaria, Alerta
+from app.cache import CacheTTL
+from app.cambios import al_confirmar
+from app.versiones import leer_versiones
+from app.agregados import stock_historico
+from sqlalchemy import func, desc, or_
 from datetime import datetime, timedelta
 
 reportes_bp = Blueprint('reportes', __name__)
 
+# Cache del resumen del dashboard. Cada worker tiene el suyo: se invalida con los
+# commits del propio proceso y, para los de otros workers, se guarda junto a la
+# versión de productos y del stock (que cubre ventas y alertas de stock) y se
+# recalcula si cambió
+_cache_resumen = CacheTTL()
+
+
+@al_confirmar
+def _invalidar_resumen(tablas):
+    if tablas & {'productos', 'stock', 'alertas', 'ventas'}:
+        _cache_resumen.limpiar()
+
+
+def _corte(fecha):
+    """?fecha=AAAA-MM-DD es el cierre de ese día; con hora (ISO 8601), ese instante"""
+    try:
+        corte = datetime.fromisoformat(fecha)
+    except ValueError:
+        return None
+    if len(fecha) == 10:
+        corte += timedelta(days=1)
+    return corte
+
+
 @reportes_bp.route('/stock', methods=['GET'])
 def reporte_stock():
-    """Stock actual por producto y categoría"""
+    """Stock actual por producto y categoría, o el que había en ?fecha="""
     categoria_id = request.args.get('categoria_id', type=int)
     solo_bajo = request.args.get('stock_bajo', 'false').lower() == 'true'
+    fecha = request.args.get('fecha')
+    
+    stock = Producto.stock_actual
+    if fecha:
+        corte = _corte(fecha)
+        if corte is None:
+            return jsonify({'error': 'Fecha inválida'}), 400
+        # Último cierre de stock_diario más los movimientos posteriores
+        historico = stock_historico(corte)
+        stock = historico.c.stock
     
     query = db.session.query(
         Producto.id,
         Producto.sku,
         Producto.nombre,
         Categoria.nombre.label('categoria'),
-        Producto.stock_actual,
+        stock.label('stock_actual'),
         Producto.stock_minimo,
         Producto.precio_venta
     ).outerjoin(Categoria, Producto.categoria_id == Categoria.id).filter(
         Producto.activo == True
     )
     
+    if fecha:
+        query = query.join(historico, historico.c.producto_id == Producto.id)
+    
     if categoria_id:
         query = query.filter(Producto.categoria_id == categoria_id)
     
     if solo_bajo:
-        query = query.filter(Producto.stock_actual <= Producto.stock_minimo)
+        query = query.filter(stock <= Producto.stock_minimo)
     
     resultados = query.order_by(Categoria.nombre, Producto.nombre).all()
     
@@ -39,7 +83,7 @@ def reporte_stock():
         'categoria': r.categoria or 'Sin categoría',
         'stock_actual': r.stock_actual,
         'stock_minimo': r.stock_minimo,
-        'estado': 'CRITICO' if r.stock_actual == 0 else ('BAJO' if r.stock_actual <= r.stock_minimo else 'OK'),
+        'estado': 'CRITICO' if r.stock_actual <= 0 else ('BAJO' if r.stock_actual <= r.stock_minimo else 'OK'),
         'valor_inventario': float(r.stock_actual * r.precio_venta)
     } for r in resultados])
 
@@ -64,9 +108,46 @@ def stock_por_categoria():
     } for r in resultados])
 
 
-@reportes_bp.route('/movimientos', methods=['GET'])
-def reporte_movimientos():
-    """Historial de movimientos con filtros"""
+@reportes_bp.route('/valorizacion', methods=['GET'])
+def valorizacion():
+    """Inventario valorizado a costo promedio ponderado (lo mantiene el posteo de compras)"""
+    categoria_id = request.args.get('categoria_id', type=int)
+    
+    valor = Producto.stock_actual * Producto.costo_promedio
+    query = db.session.query(
+        Producto.id,
+        Producto.sku,
+        Producto.nombre,
+        Categoria.nombre.label('categoria'),
+        Producto.stock_actual,
+        Producto.costo_promedio,
+        valor.label('valor')
+    ).outerjoin(Categoria, Producto.categoria_id == Categoria.id).filter(
+        Producto.activo == True,
+        Producto.stock_actual > 0
+    )
+    
+    if categoria_id:
+        query = query.filter(Producto.categoria_id == categoria_id)
+    
+    resultados = query.order_by(valor.desc()).all()
+    
+    return jsonify({
+        'valor_total': sum(r.valor for r in resultados),
+        'items': [{
+            'id': r.id,
+            'sku': r.sku,
+            'nombre': r.nombre,
+            'categoria': r.categoria or 'Sin categoría',
+            'stock_actual': r.stock_actual,
+            'costo_promedio': r.costo_promedio,
+            'valor': r.valor
+        } for r in resultados]
+    })
+
+
+def _consulta_movimientos():
+    """Movimientos con producto, filtrados por fecha_desde/fecha_hasta/tipo/motivo"""
     fecha_desde = request.args.get('fecha_desde')
     fecha_hasta = request.args.get('fecha_hasta')
     tipo = request.args.get('tipo')
@@ -93,9 +174,11 @@ def reporte_movimientos():
     if motivo:
         query = query.filter(MovimientoInventario.motivo == motivo)
     
-    resultados = query.order_by(MovimientoInventario.fecha.desc()).limit(500).all()
-    
-    return jsonify([{
+    return query
+
+
+def _fila_movimiento(r):
+    return {
         'fecha': r.fecha.isoformat() if r.fecha else None,
         'sku': r.sku,
         'producto': r.producto,
@@ -105,32 +188,114 @@ def reporte_movimientos():
         'stock_anterior': r.stock_anterior,
         'stock_nuevo': r.stock_nuevo,
         'observaciones': r.observaciones
-    } for r in resultados])
+    }
+
+
+@reportes_bp.route('/movimientos', methods=['GET'])
+def reporte_movimientos():
+    """Historial de movimientos con filtros (últimos 500; el kardex completo está en /movimientos/export)"""
+    resultados = _consulta_movimientos().order_by(MovimientoInventario.fecha.desc()).limit(500).all()
+    
+    return jsonify([_fila_movimiento(r) for r in resultados])
+
+
+TAMANO_BLOQUE_EXPORT = 1000
+
+COLUMNAS_EXPORT = [
+    'fecha', 'sku', 'producto', 'tipo', 'motivo',
+    'cantidad', 'stock_anterior', 'stock_nuevo', 'observaciones'
+]
+
+
+@reportes_bp.route('/movimientos/export', methods=['GET'])
+def exportar_movimientos():
+    """
+    Kardex completo sin límite de filas, como CSV o NDJSON (?format=csv|ndjson).
+    Las filas se leen de un cursor del servidor (yield_per) y se envían a medida
+    que llegan, así que la memoria no crece con la cantidad de movimientos.
+    """
+    formato = request.args.get('format', 'csv')
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format debe ser csv o ndjson'}), 400
+    
+    filas = _consulta_movimientos().order_by(
+        MovimientoInventario.fecha.asc(), MovimientoInventario.id.asc()
+    ).yield_per(TAMANO_BLOQUE_EXPORT)
+    
+    if formato == 'csv':
+        contenido, mimetype = _generar_csv(filas), 'text/csv'
+    else:
+        contenido, mimetype = _generar_ndjson(filas), 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(contenido),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=movimientos.{formato}'}
+    )
+
+
+def _generar_csv(filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS_EXPORT)
+    
+    for i, r in enumerate(filas, 1):
+        escritor.writerow([
+            r.fecha.isoformat() if r.fecha else '', r.sku, r.producto, r.tipo, r.motivo,
+            r.cantidad, r.stock_anterior, r.stock_nuevo, r.observaciones or ''
+        ])
+        if i % TAMANO_BLOQUE_EXPORT == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+
+def _generar_ndjson(filas):
+    bloque = []
+    for r in filas:
+        bloque.append(json.dumps(_fila_movimiento(r), ensure_ascii=False))
+        if len(bloque) == TAMANO_BLOQUE_EXPORT:
+            yield '\n'.join(bloque) + '\n'
+            bloque = []
+    
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
 
 
 @reportes_bp.route('/mas-vendidos', methods=['GET'])
 def productos_mas_vendidos():
-    """Top productos más vendidos"""
+    """Top productos más vendidos (desde el acumulado diario ventas_diarias)"""
     limit = request.args.get('limit', 10, type=int)
     dias = request.args.get('dias', 30, type=int)
     
-    fecha_inicio = datetime.utcnow() - timedelta(days=dias)
+    dia_inicio = (datetime.utcnow() - timedelta(days=dias)).date()
+    
+    # Agrega por producto sobre ventas_diarias y luego une el catálogo solo para el top
+    top = db.session.query(
+        VentaDiaria.producto_id,
+        func.sum(VentaDiaria.cantidad).label('total_vendido'),
+        func.sum(VentaDiaria.ingresos).label('total_ingresos'),
+        func.sum(VentaDiaria.num_ventas).label('num_ventas')
+    ).filter(VentaDiaria.dia >= dia_inicio
+    ).group_by(VentaDiaria.producto_id
+    ).having(func.sum(VentaDiaria.cantidad) > 0
+    ).order_by(desc('total_vendido')
+    ).limit(limit).subquery()
     
     resultados = db.session.query(
         Producto.id,
         Producto.sku,
         Producto.nombre,
         Categoria.nombre.label('categoria'),
-        func.sum(VentaDetalle.cantidad).label('total_vendido'),
-        func.sum(VentaDetalle.subtotal).label('total_ingresos'),
-        func.count(func.distinct(VentaDetalle.venta_id)).label('num_ventas')
-    ).join(VentaDetalle, Producto.id == VentaDetalle.producto_id
-    ).join(Venta, VentaDetalle.venta_id == Venta.id
+        top.c.total_vendido,
+        top.c.total_ingresos,
+        top.c.num_ventas
+    ).join(top, Producto.id == top.c.producto_id
     ).outerjoin(Categoria, Producto.categoria_id == Categoria.id
-    ).filter(Venta.fecha >= fecha_inicio
-    ).group_by(Producto.id, Producto.sku, Producto.nombre, Categoria.nombre
-    ).order_by(desc('total_vendido')
-    ).limit(limit).all()
+    ).order_by(top.c.total_vendido.desc()
+    ).all()
     
     return jsonify([{
         'id': r.id,
@@ -150,29 +315,21 @@ def productos_sin_rotacion():
     
     fecha_limite = datetime.utcnow() - timedelta(days=dias)
     
-    # Subconsulta de productos vendidos recientemente
-    vendidos_reciente = db.session.query(
-        VentaDetalle.producto_id
-    ).join(Venta).filter(
-        Venta.fecha >= fecha_limite
-    ).distinct().subquery()
-    
-    # Productos sin ventas recientes
+    # ultima_venta y ultimo_movimiento los mantiene el posteo: no recorre el historial
     resultados = db.session.query(
         Producto.id,
         Producto.sku,
         Producto.nombre,
         Categoria.nombre.label('categoria'),
         Producto.stock_actual,
-        func.max(MovimientoInventario.fecha).label('ultimo_movimiento')
+        Producto.ultimo_movimiento,
+        Producto.ultima_venta
     ).outerjoin(Categoria, Producto.categoria_id == Categoria.id
-    ).outerjoin(MovimientoInventario, Producto.id == MovimientoInventario.producto_id
     ).filter(
         Producto.activo == True,
         Producto.stock_actual > 0,
-        ~Producto.id.in_(vendidos_reciente)
-    ).group_by(Producto.id, Producto.sku, Producto.nombre, Categoria.nombre, Producto.stock_actual
-    ).order_by(func.max(MovimientoInventario.fecha).asc().nullsfirst()
+        or_(Producto.ultima_venta == None, Producto.ultima_venta < fecha_limite)
+    ).order_by(Producto.ultimo_movimiento.asc().nullsfirst()
     ).all()
     
     return jsonify([{
@@ -182,54 +339,67 @@ def productos_sin_rotacion():
         'categoria': r.categoria or 'Sin categoría',
         'stock_actual': r.stock_actual,
         'ultimo_movimiento': r.ultimo_movimiento.isoformat() if r.ultimo_movimiento else None,
+        'ultima_venta': r.ultima_venta.isoformat() if r.ultima_venta else None,
         'dias_sin_venta': (datetime.utcnow() - r.ultimo_movimiento).days if r.ultimo_movimiento else 'Nunca'
     } for r in resultados])
 
 
 @reportes_bp.route('/resumen', methods=['GET'])
 def resumen_general():
-    """Resumen general del inventario"""
+    """
+    Resumen general del inventario (una sola consulta, cacheada unos segundos).
+
+    Refleja siempre los productos, el stock y las ventas confirmados. Los
+    cambios de alertas que no vienen de un movimiento (marcarlas leídas,
+    archivarlas, generar-alertas-stock) hechos en otro proceso pueden tardar
+    hasta RESUMEN_TTL segundos en verse.
+    """
+    hoy = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    clave = (hoy, tuple((f.tabla, f.version) for f in leer_versiones('productos', 'stock')))
     
-    # Total productos
-    total_productos = Producto.query.filter_by(activo=True).count()
+    entrada = _cache_resumen.obtener('resumen')
+    if entrada is not None and entrada[0] == clave:
+        resumen = entrada[1]
+    else:
+        generacion = _cache_resumen.generacion()
+        resumen = _calcular_resumen(hoy)
+        _cache_resumen.guardar('resumen', (clave, resumen), current_app.config.get('RESUMEN_TTL', 5), generacion)
     
-    # Productos con stock bajo
-    stock_bajo = Producto.query.filter(
-        Producto.activo == True,
-        Producto.stock_actual <= Producto.stock_minimo,
-        Producto.stock_actual > 0
-    ).count()
+    return jsonify(resumen)
+
+
+def _calcular_resumen(hoy):
+    bajo_minimo = Producto.stock_actual <= Producto.stock_minimo
     
-    # Productos sin stock
-    sin_stock = Producto.query.filter(
-        Producto.activo == True,
-        Producto.stock_actual == 0
-    ).count()
-    
-    # Valor total inventario
-    valor_total = db.session.query(
-        func.sum(Producto.stock_actual * Producto.precio_venta)
-    ).filter(Producto.activo == True).scalar() or 0
-    
-    # Alertas pendientes
-    from app.models import Alerta
-    alertas_pendientes = Alerta.query.filter_by(leida=False).count()
-    
-    # Ventas del día
-    hoy = datetime.utcnow().date()
-    ventas_hoy = db.session.query(
-        func.count(Venta.id),
+    # Alertas pendientes y ventas del día como subconsultas escalares del mismo SELECT
+    alertas_pendientes = db.session.query(func.count(Alerta.id)).filter(
+        Alerta.leida == False
+    ).scalar_subquery()
+    
+    ventas_del_dia = Venta.fecha >= hoy, Venta.fecha < hoy + timedelta(days=1)
+    ventas_cantidad = db.session.query(func.count(Venta.id)).filter(*ventas_del_dia).scalar_subquery()
+    ventas_total = db.session.query(
         func.coalesce(func.sum(Venta.total), 0)
-    ).filter(func.date(Venta.fecha) == hoy).first()
+    ).filter(*ventas_del_dia).scalar_subquery()
     
-    return jsonify({
-        'total_productos': total_productos,
-        'productos_stock_bajo': stock_bajo,
-        'productos_sin_stock': sin_stock,
-        'valor_inventario': float(valor_total),
-        'alertas_pendientes': alertas_pendientes,
+    r = db.session.query(
+        func.count().label('total_productos'),
+        func.count().filter(bajo_minimo, Producto.stock_actual > 0).label('stock_bajo'),
+        func.count().filter(Producto.stock_actual <= 0).label('sin_stock'),
+        func.coalesce(func.sum(Producto.stock_actual * Producto.precio_venta), 0).label('valor_total'),
+        alertas_pendientes.label('alertas_pendientes'),
+        ventas_cantidad.label('ventas_cantidad'),
+        ventas_total.label('ventas_total')
+    ).select_from(Producto).filter(Producto.activo == True).one()
+    
+    return {
+        'total_productos': r.total_productos,
+        'productos_stock_bajo': r.stock_bajo,
+        'productos_sin_stock': r.sin_stock,
+        'valor_inventario': float(r.valor_total),
+        'alertas_pendientes': r.alertas_pendientes,
         'ventas_hoy': {
-            'cantidad': ventas_hoy[0] or 0,
-            'total': float(ventas_hoy[1] or 0)
+            'cantidad': r.ventas_cantidad or 0,
+            'total': float(r.ventas_total or 0)
         }
-    })
+    }
@@ -1,45 +1,14 @@
 from flask import Blueprint, request, jsonify
 from app import db
-from app.models import Venta, VentaDetalle, Producto, MovimientoInventario, Alerta
+from app.models import Venta, VentaDetalle
+from app.paginacion import solicita_cursor, paginar
+from app.inventario import postear_documento, postear_lote, registrar_movimientos
+from app.idempotencia import idempotente
+from app.agregados import acumular_venta, reconstruir_ultimos_movimientos
+from app.campos import seleccionar
 
 ventas_bp = Blueprint('ventas', __name__)
 
-def registrar_movimiento(producto_id, tipo, motivo, cantidad, referencia_id=None, observaciones=None):
-    """Registra movimiento y actualiza stock"""
-    producto = Producto.query.get(producto_id)
-    stock_anterior = producto.stock_actual
-    
-    if tipo == 'entrada':
-        stock_nuevo = stock_anterior + cantidad
-    else:
-        stock_nuevo = stock_anterior - cantidad
-    
-    producto.stock_actual = stock_nuevo
-    
-    movimiento = MovimientoInventario(
-        producto_id=producto_id,
-        tipo=tipo,
-        motivo=motivo,
-        cantidad=cantidad,
-        stock_anterior=stock_anterior,
-        stock_nuevo=stock_nuevo,
-        referencia_id=referencia_id,
-        observaciones=observaciones
-    )
-    db.session.add(movimiento)
-    
-    # Alerta de stock bajo
-    if stock_nuevo <= producto.stock_minimo:
-        alerta = Alerta(
-            producto_id=producto_id,
-            tipo='stock_bajo',
-            mensaje=f'Stock bajo para {producto.nombre} (SKU: {producto.sku}). Actual: {stock_nuevo}, Mínimo: {producto.stock_minimo}'
-        )
-        db.session.add(alerta)
-    
-    return movimiento
-
-
 @ventas_bp.route('', methods=['GET'])
 def get_ventas():
     fecha_desde = request.args.get('fecha_desde')
@@ -47,7 +16,7 @@ def get_ventas():
     cliente_id = request.args.get('cliente_id', type=int)
     punto_venta = request.args.get('punto_venta')
     
-    query = Venta.query
+    query = Venta.query.options(*Venta.opciones_carga())
     
     if cliente_id:
         query = query.filter_by(cliente_id=cliente_id)
@@ -58,17 +27,21 @@ def get_ventas():
     if fecha_hasta:
         query = query.filter(Venta.fecha <= fecha_hasta)
     
-    ventas = query.order_by(Venta.fecha.desc()).all()
-    return jsonify([v.to_dict() for v in ventas])
+    if solicita_cursor():
+        return jsonify(paginar(query, (Venta.fecha, Venta.id)))
+    
+    query, a_dict = seleccionar(query.order_by(Venta.fecha.desc()))
+    return jsonify([a_dict(v) for v in query.all()])
 
 
 @ventas_bp.route('/<int:id>', methods=['GET'])
 def get_venta(id):
-    venta = Venta.query.get_or_404(id)
+    venta = Venta.query.options(*Venta.opciones_carga()).get_or_404(id)
     return jsonify(venta.to_dict())
 
 
 @ventas_bp.route('', methods=['POST'])
+@idempotente
 def create_venta():
     """
     Crear venta y registrar salida de inventario automáticamente
@@ -83,73 +56,70 @@ def create_venta():
         ]
     }
     """
-    data = request.get_json()
+    venta = postear_venta(request.get_json())
     
-    # Verificar stock disponible
-    for item in data['detalles']:
-        producto = Producto.query.get(item['producto_id'])
-        if not producto:
-            return jsonify({'error': f'Producto {item["producto_id"]} no existe'}), 400
-        if producto.stock_actual < item['cantidad']:
-            return jsonify({
-                'error': f'Stock insuficiente para {producto.nombre}. Disponible: {producto.stock_actual}'
-            }), 400
+    # El commit lo hace idempotente, junto con la respuesta
+    venta = db.session.get(Venta, venta.id, options=Venta.opciones_carga(), populate_existing=True)
+    return jsonify(venta.to_dict()), 201
+
+
+@ventas_bp.route('/batch', methods=['POST'])
+@idempotente
+def create_ventas_batch():
+    """
+    Carga masiva de ventas (tickets acumulados offline por un POS)
     
-    # Crear venta
+    Body esperado: lista de ventas con el mismo formato de POST /api/ventas.
+    Query opcional: ?bloque=500 documentos por commit.
+    Devuelve el resultado de cada venta por su índice en la lista.
+    """
+    bloque = request.args.get('bloque', type=int)
+    return jsonify(postear_lote(request.get_json(), postear_venta, bloque))
+
+
+def postear_venta(data):
+    """Crea la venta y descuenta el inventario (sin commit)"""
     venta = Venta(
         cliente_id=data.get('cliente_id'),
         punto_venta=data.get('punto_venta')
     )
-    db.session.add(venta)
-    db.session.flush()
-    
-    total = 0
     
-    for item in data['detalles']:
-        subtotal = item['cantidad'] * item['precio_unitario']
-        total += subtotal
-        
-        detalle = VentaDetalle(
-            venta_id=venta.id,
-            producto_id=item['producto_id'],
-            cantidad=item['cantidad'],
-            precio_unitario=item['precio_unitario'],
-            subtotal=subtotal
-        )
-        db.session.add(detalle)
-        
-        # Registrar salida de inventario
-        registrar_movimiento(
-            producto_id=item['producto_id'],
-            tipo='salida',
-            motivo='venta',
-            cantidad=item['cantidad'],
-            referencia_id=venta.id,
-            observaciones=f'Venta #{venta.id}'
-        )
-    
-    venta.total = total
-    db.session.commit()
+    # Valida stock, descuenta inventario y guarda detalles en bloque
+    postear_documento(
+        venta, VentaDetalle, data['detalles'],
+        tipo='salida',
+        motivo='venta',
+        observaciones='Venta #{id}'
+    )
+    acumular_venta(venta.fecha, data['detalles'])
     
-    return jsonify(venta.to_dict()), 201
+    return venta
 
 
 @ventas_bp.route('/<int:id>', methods=['DELETE'])
 def delete_venta(id):
     """Cancelar venta y devolver stock"""
     venta = Venta.query.get_or_404(id)
+    producto_ids = {d.producto_id for d in venta.detalles}
+    
+    registrar_movimientos(
+        [{'producto_id': d.producto_id, 'cantidad': d.cantidad} for d in venta.detalles],
+        tipo='entrada',
+        motivo='ajuste',
+        referencia_id=venta.id,
+        observaciones=f'Cancelación de venta #{venta.id}'
+    )
     
-    for detalle in venta.detalles:
-        registrar_movimiento(
-            producto_id=detalle.producto_id,
-            tipo='entrada',
-            motivo='ajuste',
-            cantidad=detalle.cantidad,
-            referencia_id=venta.id,
-            observaciones=f'Cancelación de venta #{venta.id}'
-        )
+    acumular_venta(venta.fecha, [{
+        'producto_id': d.producto_id,
+        'cantidad': d.cantidad,
+        'precio_unitario': d.precio_unitario
+    } for d in venta.detalles], signo=-1)
     
     db.session.delete(venta)
+    db.session.flush()
+    # Sin esta venta, la última venta de sus productos puede ser otra
+    reconstruir_ultimos_movimientos(producto_ids)
     db.session.commit()
     
     return jsonify({'message': 'Venta cancelada y stock restaurado'})
@@ -0,0 +1,86 @@
+"""
+ETag / Last-Modified para los catálogos.
+
+Cada commit que modifica una tabla versionada incrementa su fila en
+versiones_tablas dentro de la misma transacción. Un GET condicional lee solo
+esas filas y responde 304 sin cargar el catálogo si la versión no cambió.
+
+El stock no tiene fila: cambia en cada venta y esa fila serializaría los
+commits del POS. Toda escritura de stock inserta un movimiento, así que su
+versión es el último id del kardex, que se lee en la misma consulta.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import request, make_response
+from sqlalchemy import event, func, literal, select, union_all
+from app import db
+from app.models import VersionTabla, MovimientoInventario
+from app.agregados import insert_con_conflicto
+
+TABLAS_VERSIONADAS = {'categorias', 'proveedores', 'clientes', 'productos'}
+
+
+@event.listens_for(db.session, 'before_commit')
+def _incrementar(session):
+    session.flush()
+    tablas = sorted(TABLAS_VERSIONADAS & session.info.get('tablas_modificadas', set()))
+    if not tablas:
+        return
+
+    ahora = datetime.utcnow()
+    sentencia = insert_con_conflicto(VersionTabla).values([
+        {'tabla': t, 'version': 1, 'modificada': ahora} for t in tablas
+    ])
+    session.execute(sentencia.on_conflict_do_update(
+        index_elements=['tabla'],
+        set_={'version': VersionTabla.version + 1, 'modificada': sentencia.excluded.modificada}
+    ))
+
+
+def leer_versiones(*tablas):
+    """Filas (tabla, version, modificada) de las tablas pedidas, en una consulta; 'stock' es el último id del kardex"""
+    consulta = select(VersionTabla.tabla, VersionTabla.version, VersionTabla.modificada).where(
+        VersionTabla.tabla.in_(tablas)
+    )
+    if 'stock' in tablas:
+        consulta = union_all(consulta, select(
+            literal('stock'), func.coalesce(func.max(MovimientoInventario.id), 0),
+            func.max(MovimientoInventario.fecha)
+        ))
+    return db.session.execute(consulta).all()
+
+
+def condicional(*tablas):
+    """
+    GET con ETag débil y Last-Modified según la versión de las tablas de las
+    que depende la respuesta (p. ej. productos también muestra el nombre de la categoría).
+    'stock' es la versión de existencias y costos (stock_actual, costo_promedio, ...).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            filas = leer_versiones(*tablas)
+            versiones = {f.tabla: f.version for f in filas}
+            clave = '|'.join(f'{t}:{versiones.get(t, 0)}' for t in tablas) + '|' + request.full_path
+            etag = hashlib.sha1(clave.encode()).hexdigest()[:20]
+            modificada = max((f.modificada for f in filas if f.modificada), default=None)
+
+            if request.if_none_match:
+                sin_cambios = request.if_none_match.contains_weak(etag)
+            else:
+                sin_cambios = (modificada is not None and request.if_modified_since is not None
+                               and modificada.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))
+
+            respuesta = make_response('', 304) if sin_cambios else make_response(vista(*args, **kwargs))
+            if respuesta.status_code in (200, 304):
+                respuesta.set_etag(etag, weak=True)
+                if modificada:
+                    respuesta.last_modified = modificada
+                # Sin no-cache el navegador podría reutilizar la copia sin preguntar
+                respuesta.headers['Cache-Control'] = 'no-cache'
+            return respuesta
+
+        return envoltura
+
+    return decorador
@@ -0,0 +1,234 @@
+"""
+Prueba de carga del POS y del dashboard: solicitudes por segundo y latencia p50/p99.
+
+    python -m benchmarks.carga [--url http://127.0.0.1:5000] [--duracion 30] [--concurrencia 16]
+                               [--salida carga-<commit>.json] [--comparar base.json] [--tolerancia 0.2]
+
+Necesita el servidor corriendo (gunicorn -c gunicorn.conf.py wsgi:app) sobre una
+base cargada con benchmarks.sembrar. Cada escenario corre por separado durante
+--duracion segundos con --concurrencia clientes keep-alive, después de unos
+segundos de calentamiento. Las ventas y compras usan productos al azar del catálogo.
+
+El resultado se guarda en JSON junto con el commit, para comparar ramas: con
+--comparar, termina con código 1 si algún escenario bajó sus req/s o subió su p99
+más de --tolerancia respecto del archivo base.
+"""
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+def _venta(rng, ids):
+    return {
+        'punto_venta': f'POS-{rng.randint(1, 20):02}',
+        'detalles': [
+            {'producto_id': p, 'cantidad': 1, 'precio_unitario': 10}
+            for p in rng.sample(ids['productos'], rng.randint(1, 4))
+        ]
+    }
+
+
+def _compra(rng, ids):
+    return {
+        'proveedor_id': rng.choice(ids['proveedores']),
+        'numero_documento': f'CARGA-{rng.randint(1, 10 ** 9)}',
+        'detalles': [
+            {'producto_id': p, 'cantidad': rng.randint(10, 100), 'precio_unitario': 5}
+            for p in rng.sample(ids['productos'], 10)
+        ]
+    }
+
+
+# nombre -> (método, ruta, generador del body)
+ESCENARIOS = {
+    'POST /api/ventas': ('POST', '/api/ventas', _venta),
+    'POST /api/compras': ('POST', '/api/compras', _compra),
+    'GET /api/reportes/resumen': ('GET', '/api/reportes/resumen', None),
+    'GET /api/reportes/mas-vendidos': ('GET', '/api/reportes/mas-vendidos?dias=30', None),
+    'GET /api/reportes/menos-rotacion': ('GET', '/api/reportes/menos-rotacion?dias=30', None),
+    # Lo que piden las pantallas de ventas, compras y productos: el catálogo completo
+    'GET /api/productos': ('GET', '/api/productos', None),
+    'GET /api/productos?limit=50': ('GET', '/api/productos?limit=50', None),
+}
+
+# Estado esperado por método; cualquier otro cuenta como error
+ESPERADO = {'GET': 200, 'POST': 201}
+
+
+class _Cliente:
+    """Conexión keep-alive que se reabre si el servidor la cierra"""
+
+    def __init__(self, host, puerto):
+        self.host, self.puerto = host, puerto
+        self.conexion = None
+
+    def pedir(self, metodo, ruta, body=None, comprimido=True):
+        if self.conexion is None:
+            self.conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=60)
+        cabeceras = {'Accept-Encoding': 'gzip'} if comprimido else {}
+        if body is not None:
+            body = json.dumps(body)
+            cabeceras['Content-Type'] = 'application/json'
+        try:
+            self.conexion.request(metodo, ruta, body=body, headers=cabeceras)
+            respuesta = self.conexion.getresponse()
+            cuerpo = respuesta.read()
+        except (OSError, http.client.HTTPException):
+            self.conexion.close()
+            self.conexion = None
+            return None, b''
+        if respuesta.getheader('Connection', '').lower() == 'close':
+            self.conexion.close()
+            self.conexion = None
+        return respuesta.status, cuerpo
+
+
+def _ids(host, puerto, ruta):
+    """Todos los ids de un listado, recorriendo el cursor de a 500 si el listado es paginado"""
+    cliente = _Cliente(host, puerto)
+    ids, cursor = [], None
+    while True:
+        consulta = f'{ruta}?limit=500&fields=id' + (f'&after={cursor}' if cursor else '')
+        status, cuerpo = cliente.pedir('GET', consulta, comprimido=False)
+        if status != 200:
+            sys.exit(f'GET {ruta} respondió {status}; ¿está corriendo el servidor?')
+        pagina = json.loads(cuerpo)
+        if isinstance(pagina, list):
+            return [fila['id'] for fila in pagina]
+        ids += [fila['id'] for fila in pagina['items']]
+        cursor = pagina.get('next_cursor')
+        if not cursor:
+            return ids
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return None
+    return ordenadas[min(int(len(ordenadas) * p / 100), len(ordenadas) - 1)]
+
+
+def correr(host, puerto, escenario, ids, duracion, concurrencia, semilla):
+    """Latencias (ms) y errores de `concurrencia` clientes durante `duracion` segundos"""
+    metodo, ruta, generar = ESCENARIOS[escenario]
+    fin = time.perf_counter() + duracion
+    lock = threading.Lock()
+    latencias, errores = [], [0]
+
+    def cliente(n):
+        rng = random.Random(semilla * 1000 + n)
+        conexion = _Cliente(host, puerto)
+        propias, fallidas = [], 0
+        while time.perf_counter() < fin:
+            body = generar(rng, ids) if generar else None
+            inicio = time.perf_counter()
+            status, _ = conexion.pedir(metodo, ruta, body)
+            propias.append((time.perf_counter() - inicio) * 1000)
+            if status != ESPERADO[metodo]:
+                fallidas += 1
+        with lock:
+            latencias.extend(propias)
+            errores[0] += fallidas
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as pool:
+        list(pool.map(cliente, range(concurrencia)))
+    return latencias, errores[0], time.perf_counter() - inicio
+
+
+def medir(host, puerto, escenario, ids, args):
+    correr(host, puerto, escenario, ids, args.calentamiento, args.concurrencia, args.semilla)
+    latencias, errores, segundos = correr(host, puerto, escenario, ids, args.duracion, args.concurrencia, args.semilla)
+    latencias.sort()
+    return {
+        'solicitudes': len(latencias),
+        'errores': errores,
+        'rps': round(len(latencias) / segundos, 1),
+        'p50_ms': round(_percentil(latencias, 50), 1) if latencias else None,
+        'p99_ms': round(_percentil(latencias, 99), 1) if latencias else None,
+        'max_ms': round(latencias[-1], 1) if latencias else None,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultado, base, tolerancia):
+    """Escenarios que empeoraron respecto de la base: [(escenario, motivo), ...]"""
+    regresiones = []
+    for escenario, actual in resultado['escenarios'].items():
+        previo = base['escenarios'].get(escenario)
+        if not previo:
+            continue
+        if previo['rps'] and actual['rps'] < previo['rps'] * (1 - tolerancia):
+            regresiones.append((escenario, f'req/s {previo["rps"]} -> {actual["rps"]}'))
+        if previo['p99_ms'] and actual['p99_ms'] and actual['p99_ms'] > previo['p99_ms'] * (1 + tolerancia):
+            regresiones.append((escenario, f'p99 {previo["p99_ms"]} ms -> {actual["p99_ms"]} ms'))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--duracion', type=float, default=30, help='segundos por escenario')
+    parser.add_argument('--calentamiento', type=float, default=5, help='segundos antes de medir cada escenario')
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--escenario', action='append', choices=list(ESCENARIOS), help='repetible; por defecto todos')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', help='por defecto carga-<commit>.json')
+    parser.add_argument('--comparar', metavar='BASE', help='resultado anterior (JSON) contra el cual comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, puerto = url.hostname, url.port or 80
+    ids = {'productos': _ids(host, puerto, '/api/productos'), 'proveedores': _ids(host, puerto, '/api/proveedores')}
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'url': args.url,
+        'concurrencia': args.concurrencia,
+        'duracion_s': args.duracion,
+        'productos': len(ids['productos']),
+        'escenarios': {}
+    }
+
+    print(f'{len(ids["productos"])} productos, concurrencia {args.concurrencia}, {args.duracion:g} s por escenario')
+    print(f'{"escenario":<36}{"req/s":>9}{"p50 ms":>9}{"p99 ms":>9}{"errores":>9}')
+    for escenario in args.escenario or ESCENARIOS:
+        r = medir(host, puerto, escenario, ids, args)
+        resultado['escenarios'][escenario] = r
+        print(f'{escenario:<36}{r["rps"]:>9}{r["p50_ms"]:>9}{r["p99_ms"]:>9}{r["errores"]:>9}')
+
+    salida = args.salida or f'carga-{resultado["commit"] or "local"}.json'
+    with open(salida, 'w') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f'Resultado en {salida}')
+
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        for escenario, motivo in regresiones:
+            print(f'REGRESIÓN {escenario}: {motivo}')
+        if regresiones:
+            sys.exit(1)
+        print(f'Sin regresiones respecto de {args.comparar} (commit {base.get("commit")})')
+
+
+if __name__ == '__main__':
+    main()
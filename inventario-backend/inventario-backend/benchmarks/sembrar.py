@@ -0,0 +1,237 @@
+"""
+Carga una base de prueba grande para benchmarks.carga.
+
+    python -m benchmarks.sembrar [--productos 50000] [--ventas 200000] [--movimientos 1000000] [--reiniciar]
+
+Usa la base de DATABASE_URL (pensado para un PostgreSQL local). Genera catálogos,
+ventas con sus detalles y compras repartidas en --dias días, en orden de fecha,
+con movimientos de inventario consistentes (stock_anterior / stock_nuevo, desde
+un movimiento de stock inicial por producto) y el stock final en productos. Las
+compras completan los movimientos que no salen de ventas (el total queda cerca
+de --movimientos). Al final reconstruye ventas_diarias, las fechas de último
+movimiento / venta y el costo promedio, y corre ANALYZE.
+
+Con la misma --semilla los datos son los mismos. --reiniciar borra y recrea el
+esquema; sin él, la base tiene que estar vacía.
+"""
+import argparse
+import heapq
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import bindparam, func, insert, text, update
+from app import create_app, db
+from app.agregados import reconstruir_ventas_diarias, reconstruir_ultimos_movimientos, reconstruir_costos
+from app.migraciones import migrar
+from app.models import (
+    Categoria, Proveedor, Cliente, Producto, Compra, CompraDetalle, Venta, VentaDetalle,
+    MovimientoInventario
+)
+
+STOCK_INICIAL = 10000
+SIN_ROTACION = 0.02  # fracción de productos que nunca se venden ni se compran
+LINEAS_COMPRA = 10
+PUNTOS_VENTA = 20
+
+ADJETIVOS = ['Grande', 'Pequeño', 'Premium', 'Económico', 'Rojo', 'Azul', 'Integral', 'Light', 'Familiar', 'Extra']
+SUSTANTIVOS = ['Arroz', 'Frijol', 'Aceite', 'Azúcar', 'Café', 'Jabón', 'Detergente', 'Galleta', 'Leche', 'Cereal',
+               'Pasta', 'Salsa', 'Atún', 'Harina', 'Refresco', 'Papel', 'Cloro', 'Shampoo', 'Yogur', 'Queso']
+
+# Orden de inserción de cada bloque (claves foráneas)
+TABLAS = [Venta, Compra, VentaDetalle, CompraDetalle, MovimientoInventario]
+DOCUMENTO = {VentaDetalle: 'venta_id', CompraDetalle: 'compra_id'}
+
+
+class _Bloques:
+    """Acumula filas por tabla y las inserta cada `tamano` filas"""
+
+    def __init__(self, conexion, tamano):
+        self.conexion = conexion
+        self.tamano = tamano
+        self.filas = {modelo: [] for modelo in TABLAS}
+        self.insertadas = dict.fromkeys(TABLAS, 0)
+
+    def agregar(self, modelo, fila):
+        self.filas[modelo].append(fila)
+        if len(self.filas[modelo]) >= self.tamano:
+            self.vaciar()
+
+    def vaciar(self):
+        for modelo in TABLAS:
+            if self.filas[modelo]:
+                self.conexion.execute(insert(modelo), self.filas[modelo])
+                self.insertadas[modelo] += len(self.filas[modelo])
+                self.filas[modelo] = []
+
+
+def _fechas(rng, cantidad, inicio, dias):
+    """`cantidad` fechas al azar entre inicio e inicio + dias, ordenadas"""
+    segundos = dias * 86400
+    return (inicio + timedelta(seconds=s) for s in sorted(rng.random() * segundos for _ in range(cantidad)))
+
+
+def _catalogos(conexion, rng, args):
+    conexion.execute(insert(Categoria), [
+        {'id': i, 'nombre': f'Categoría {i}'} for i in range(1, args.categorias + 1)
+    ])
+    conexion.execute(insert(Proveedor), [
+        {'id': i, 'nombre': f'Proveedor {i}', 'telefono': f'5{i:07}'} for i in range(1, args.proveedores + 1)
+    ])
+    conexion.execute(insert(Cliente), [
+        {'id': i, 'nombre': f'Cliente {i}', 'nit': f'{i:08}', 'tipo': 'mayorista' if i % 10 == 0 else 'minorista'}
+        for i in range(1, args.clientes + 1)
+    ])
+
+    precios = {}
+    filas = []
+    for i in range(1, args.productos + 1):
+        compra = Decimal(rng.randint(100, 50000)) / 100
+        precios[i] = (compra, (compra * Decimal('1.3')).quantize(Decimal('0.01')))
+        filas.append({
+            'id': i, 'sku': f'BENCH{i:06}', 'nombre': f'{rng.choice(SUSTANTIVOS)} {rng.choice(ADJETIVOS)} {i}',
+            'categoria_id': rng.randint(1, args.categorias), 'precio_compra': precios[i][0],
+            'precio_venta': precios[i][1], 'stock_actual': STOCK_INICIAL, 'stock_minimo': rng.randint(3, 20)
+        })
+        if len(filas) >= args.bloque:
+            conexion.execute(insert(Producto), filas)
+            filas = []
+    if filas:
+        conexion.execute(insert(Producto), filas)
+    return precios
+
+
+def _documentos(conexion, rng, args, precios):
+    """Ventas y compras intercaladas por fecha, con sus detalles y movimientos"""
+    con_rotacion = int(args.productos * (1 - SIN_ROTACION)) or args.productos
+    lineas_venta = [rng.randint(1, 4) for _ in range(args.ventas)]
+    restantes = max(args.movimientos - sum(lineas_venta), 0)
+    num_compras = -(-restantes // LINEAS_COMPRA)
+
+    inicio = datetime.utcnow() - timedelta(days=args.dias)
+    eventos = heapq.merge(
+        ((fecha, 'venta', i) for i, fecha in enumerate(_fechas(rng, args.ventas, inicio, args.dias), 1)),
+        ((fecha, 'compra', i) for i, fecha in enumerate(_fechas(rng, num_compras, inicio, args.dias), 1))
+    )
+
+    stock = dict.fromkeys(precios, STOCK_INICIAL)
+    bloques = _Bloques(conexion, args.bloque)
+    detalle_id = {VentaDetalle: 0, CompraDetalle: 0}
+
+    # El stock inicial también entra por el kardex (stock_historico solo suma movimientos)
+    for producto_id in precios:
+        bloques.agregar(MovimientoInventario, {
+            'producto_id': producto_id, 'tipo': 'entrada', 'motivo': 'ajuste', 'cantidad': STOCK_INICIAL,
+            'stock_anterior': 0, 'stock_nuevo': STOCK_INICIAL, 'observaciones': 'Stock inicial', 'fecha': inicio
+        })
+
+    def linea(modelo, documento_id, producto_id, cantidad, precio, tipo, motivo, fecha, observaciones):
+        # Las compras llevan su costo en el kardex; reconstruir_costos calcula el promedio al final
+        detalle_id[modelo] += 1
+        bloques.agregar(modelo, {
+            'id': detalle_id[modelo], DOCUMENTO[modelo]: documento_id,
+            'producto_id': producto_id, 'cantidad': cantidad, 'precio_unitario': precio,
+            'subtotal': cantidad * precio
+        })
+        anterior = stock[producto_id]
+        stock[producto_id] = anterior + cantidad if tipo == 'entrada' else anterior - cantidad
+        bloques.agregar(MovimientoInventario, {
+            'producto_id': producto_id, 'tipo': tipo, 'motivo': motivo, 'cantidad': cantidad,
+            'stock_anterior': anterior, 'stock_nuevo': stock[producto_id], 'referencia_id': documento_id,
+            'observaciones': observaciones, 'costo_unitario': precio if motivo == 'compra' else None,
+            'fecha': fecha
+        })
+
+    for fecha, tipo, i in eventos:
+        # El documento va antes que sus detalles, que pueden insertarse en el mismo bloque
+        if tipo == 'venta':
+            # Pocos productos concentran la mayoría de las ventas
+            productos = {int(con_rotacion * rng.random() ** 2) + 1 for _ in range(lineas_venta[i - 1])}
+            lineas = [(p, min(rng.randint(1, 3), stock[p]), precios[p][1]) for p in sorted(productos)]
+            lineas = [l for l in lineas if l[1]]
+            bloques.agregar(Venta, {
+                'id': i, 'cliente_id': rng.randint(1, args.clientes) if rng.random() < 0.3 else None,
+                'punto_venta': f'POS-{rng.randint(1, PUNTOS_VENTA):02}',
+                'total': sum(c * precio for _, c, precio in lineas), 'fecha': fecha
+            })
+            for producto_id, cantidad, precio in lineas:
+                linea(VentaDetalle, i, producto_id, cantidad, precio, 'salida', 'venta', fecha, f'Venta #{i}')
+        else:
+            cuantas = min(LINEAS_COMPRA, restantes - (i - 1) * LINEAS_COMPRA)
+            lineas = [(p, rng.randint(10, 100), precios[p][0])
+                      for p in sorted(rng.sample(range(1, con_rotacion + 1), cuantas))]
+            bloques.agregar(Compra, {
+                'id': i, 'proveedor_id': rng.randint(1, args.proveedores), 'numero_documento': f'FAC-{i:07}',
+                'total': sum(c * precio for _, c, precio in lineas), 'fecha': fecha
+            })
+            for producto_id, cantidad, precio in lineas:
+                linea(CompraDetalle, i, producto_id, cantidad, precio, 'entrada', 'compra', fecha, f'Compra #{i}')
+    bloques.vaciar()
+
+    # Stock final de cada producto según sus movimientos
+    conexion.execute(
+        update(Producto).where(Producto.id == bindparam('b_id')).values(stock_actual=bindparam('b_stock')),
+        [{'b_id': producto_id, 'b_stock': s} for producto_id, s in stock.items() if s != STOCK_INICIAL]
+    )
+    return bloques.insertadas
+
+
+def _ajustar_secuencias(conexion):
+    """Los ids se insertaron a mano: las secuencias de PostgreSQL siguen desde el máximo"""
+    for modelo in [Categoria, Proveedor, Cliente, Producto, *TABLAS]:
+        tabla = modelo.__tablename__
+        conexion.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), coalesce(max(id), 0) + 1, false) FROM {tabla}"
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--productos', type=int, default=50000)
+    parser.add_argument('--ventas', type=int, default=200000)
+    parser.add_argument('--movimientos', type=int, default=1000000)
+    parser.add_argument('--categorias', type=int, default=50)
+    parser.add_argument('--proveedores', type=int, default=200)
+    parser.add_argument('--clientes', type=int, default=2000)
+    parser.add_argument('--dias', type=int, default=365)
+    parser.add_argument('--bloque', type=int, default=5000, help='filas por INSERT')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--reiniciar', action='store_true', help='borra y recrea el esquema antes de cargar')
+    args = parser.parse_args()
+
+    app = create_app()
+    rng = random.Random(args.semilla)
+
+    with app.app_context():
+        if args.reiniciar:
+            db.drop_all()
+            db.create_all()
+            migrar()
+        elif db.session.query(func.count(Producto.id)).scalar():
+            sys.exit('La base ya tiene productos; use --reiniciar para borrarla')
+        db.session.close()
+
+        inicio = time.perf_counter()
+        with db.engine.begin() as conexion:
+            precios = _catalogos(conexion, rng, args)
+            insertadas = _documentos(conexion, rng, args, precios)
+            if conexion.dialect.name == 'postgresql':
+                _ajustar_secuencias(conexion)
+
+        reconstruir_ventas_diarias()
+        reconstruir_ultimos_movimientos()
+        reconstruir_costos()
+        db.session.commit()
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.connect() as conexion:
+                conexion.execution_options(isolation_level='AUTOCOMMIT').exec_driver_sql('ANALYZE')
+
+        print(f'{args.productos} productos')
+        for modelo, n in insertadas.items():
+            print(f'{n} {modelo.__tablename__}')
+        print(f'Listo en {time.perf_counter() - inicio:.0f} s')
+
+
+if __name__ == '__main__':
+    main()
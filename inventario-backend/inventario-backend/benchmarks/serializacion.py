@@ -0,0 +1,92 @@
+"""
+Tiempo de serializar y comprimir un listado de 10k movimientos.
+
+    python -m benchmarks.serializacion [--filas 10000] [--repeticiones 5]
+
+No usa la base: arma los movimientos en memoria con el mismo to_dict() que
+/api/movimientos. Compara json de Flask con las conversiones que hacía to_dict()
+antes (float/isoformat por campo), ProveedorJSON con json estándar y con orjson,
+y la compresión gzip / br del cuerpo resultante.
+"""
+import argparse
+import gzip
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app import respuestas
+from app.models import MovimientoInventario, Producto
+
+
+def _movimientos(n):
+    inicio = datetime(2025, 1, 1)
+    productos = [
+        Producto(id=i, sku=f'SKU{i:05}', nombre=f'Producto {i}', precio_venta=Decimal('10.50'))
+        for i in range(1, 201)
+    ]
+    movimientos = []
+    for i in range(n):
+        m = MovimientoInventario(
+            id=i + 1, producto_id=productos[i % 200].id, tipo='salida' if i % 3 else 'entrada',
+            motivo='venta' if i % 3 else 'compra', cantidad=i % 7 + 1, stock_anterior=100,
+            stock_nuevo=100 - (i % 7 + 1), referencia_id=i // 3, observaciones=f'Venta #{i // 3}',
+            fecha=inicio + timedelta(minutes=i)
+        )
+        m.producto = productos[i % 200]
+        movimientos.append(m)
+    return movimientos
+
+
+def _medir(funcion, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - t
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    filas = [m.to_dict() for m in _movimientos(args.filas)]
+    filas_antes = [{**f, 'fecha': f['fecha'].isoformat()} for f in filas]  # to_dict() convertía cada campo
+
+    flask_json = DefaultJSONProvider(app)
+    proveedor = respuestas.ProveedorJSON(app)
+    orjson = respuestas.orjson
+
+    resultados = {}
+    resultados['flask json (antes)'] = _medir(
+        lambda: flask_json.dumps(filas_antes, separators=(',', ':')).encode(), args.repeticiones
+    )
+    respuestas.orjson = None
+    resultados['ProveedorJSON, json estándar'] = _medir(lambda: proveedor._dumps(filas), args.repeticiones)
+    respuestas.orjson = orjson
+    if orjson is not None:
+        resultados['ProveedorJSON, orjson'] = _medir(lambda: proveedor._dumps(filas), args.repeticiones)
+
+    print(f'{args.filas} movimientos (mejor de {args.repeticiones})')
+    print(f'{"serialización":<32}{"ms":>10}{"bytes":>12}')
+    for nombre, (ms, cuerpo) in resultados.items():
+        print(f'{nombre:<32}{ms:>10.1f}{len(cuerpo):>12}')
+
+    cuerpo = list(resultados.values())[-1][1]
+    compresores = [('gzip 6', lambda: gzip.compress(cuerpo, compresslevel=6))]
+    if respuestas.brotli is not None:
+        compresores.append(('br 4', lambda: respuestas.brotli.compress(cuerpo, quality=4)))
+
+    print(f'\n{"compresión":<32}{"ms":>10}{"bytes":>12}')
+    for nombre, comprimir in compresores:
+        ms, comprimido = _medir(comprimir, args.repeticiones)
+        print(f'{nombre:<32}{ms:>10.1f}{len(comprimido):>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Tiempo de arranque y solicitudes por segundo: run.py (servidor de desarrollo)
+contra gunicorn con wsgi.py.
+
+    python -m benchmarks.servidor [--ruta /api/productos] [--solicitudes 2000] [--concurrencia 16]
+
+Usa la base de DATABASE_URL. Cada servidor se levanta en un proceso aparte en
+el puerto 5000; el arranque se mide hasta que /api/health responde.
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HOST, PUERTO = '127.0.0.1', 5000
+
+SERVIDORES = {
+    'run.py': [sys.executable, 'run.py'],
+    'gunicorn wsgi:app': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+}
+
+
+def _esperar(limite=60):
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite:
+        try:
+            conexion = http.client.HTTPConnection(HOST, PUERTO, timeout=1)
+            conexion.request('GET', '/api/health')
+            if conexion.getresponse().status == 200:
+                return time.perf_counter() - inicio
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('El servidor no respondió')
+
+
+def _carga(ruta, solicitudes, concurrencia):
+    """Solicitudes por segundo con `concurrencia` clientes keep-alive"""
+    por_cliente = solicitudes // concurrencia
+
+    def cliente(_):
+        conexion = http.client.HTTPConnection(HOST, PUERTO, timeout=30)
+        errores = 0
+        for _ in range(por_cliente):
+            conexion.request('GET', ruta)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores += 1
+            if respuesta.getheader('Connection', '').lower() == 'close':
+                conexion.close()
+                conexion = http.client.HTTPConnection(HOST, PUERTO, timeout=30)
+        return errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(concurrencia) as pool:
+        errores = sum(pool.map(cliente, range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+    return por_cliente * concurrencia / duracion, errores
+
+
+def medir(nombre, comando, args):
+    entorno = {**os.environ, 'GUNICORN_BIND': f'{HOST}:{PUERTO}'}
+    proceso = subprocess.Popen(
+        comando, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True  # run.py con debug lanza un segundo proceso (reloader)
+    )
+    try:
+        arranque = _esperar()
+        _carga(args.ruta, args.concurrencia * 5, args.concurrencia)  # calentamiento
+        rps, errores = _carga(args.ruta, args.solicitudes, args.concurrencia)
+    finally:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        proceso.wait()
+    return {'servidor': nombre, 'arranque_s': round(arranque, 2), 'rps': round(rps, 1), 'errores': errores}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ruta', default='/api/health')
+    parser.add_argument('--solicitudes', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f'GET {args.ruta}, {args.solicitudes} solicitudes, concurrencia {args.concurrencia}')
+    print(f'{"servidor":<22}{"arranque s":>12}{"req/s":>10}{"errores":>9}')
+    for nombre, comando in SERVIDORES.items():
+        r = medir(nombre, comando, args)
+        print(f'{r["servidor"]:<22}{r["arranque_s"]:>12}{r["rps"]:>10}{r["errores"]:>9}')
+
+
+if __name__ == '__main__':
+    main()
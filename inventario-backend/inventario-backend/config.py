@@ -11,6 +11,54 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JSON_SORT_KEYS = False
+    
+    # Documentos por commit en /api/ventas/batch y /api/compras/batch
+    TAMANO_LOTE = int(os.getenv('TAMANO_LOTE', 200))
+    
+    # Idempotency-Key: segundos sin avance para retomar un lote interrumpido, y días que se guardan las claves
+    IDEMPOTENCIA_ESPERA = int(os.getenv('IDEMPOTENCIA_ESPERA', 60))
+    IDEMPOTENCIA_DIAS = int(os.getenv('IDEMPOTENCIA_DIAS', 7))
+    
+    # Segundos que se cachea /api/reportes/resumen; se recalcula antes si cambian productos o
+    # stock, así que es el retraso máximo de las alertas leídas en otro worker
+    RESUMEN_TTL = int(os.getenv('RESUMEN_TTL', 5))
+    
+    # Respuestas con más bytes que esto se comprimen (gzip o br)
+    COMPRESION_MINIMA = int(os.getenv('COMPRESION_MINIMA', 1024))
+    
+    # Pool de conexiones (por proceso y por base): una por hilo de gunicorn y sin
+    # temporales, así el total por host queda acotado (ver workers en gunicorn.conf.py)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', os.getenv('GUNICORN_THREADS', 8))),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 0)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),  # segundos esperando una conexión libre
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
+    
+    # statement_timeout (ms) por blueprint o endpoint, 0 = sin límite (solo PostgreSQL)
+    TIMEOUT_SENTENCIA = int(os.getenv('TIMEOUT_SENTENCIA', 10000))
+    TIMEOUTS_SENTENCIA = {
+        'ventas': 3000,
+        'compras': 3000,
+        'devoluciones': 3000,
+        'movimientos': 3000,
+        'reportes': 30000,
+        'reportes.exportar_movimientos': 0
+    }
+    
+    # Réplica de solo lectura (opcional) para los GET de reportes y listados
+    SQLALCHEMY_BINDS = {'replica': os.getenv('REPLICA_DATABASE_URL')} if os.getenv('REPLICA_DATABASE_URL') else {}
+    REPLICA_BLUEPRINTS = (
+        'reportes', 'movimientos', 'ventas', 'compras', 'devoluciones',
+        'productos', 'categorias', 'proveedores', 'clientes', 'alertas'
+    )
+    REPLICA_RETRASO_MAXIMO = float(os.getenv('REPLICA_RETRASO_MAXIMO', 5))  # segundos; si no, primaria
+    REPLICA_CHEQUEO = 2  # segundos entre revisiones del retraso
+    REPLICA_VENTANA_ESCRITURA = 5  # segundos que un cliente lee de la primaria después de escribir
+    
+    # Solicitudes más lentas que esto se registran en el log con sus sentencias SQL
+    METRICAS_LENTA_MS = int(os.getenv('METRICAS_LENTA_MS', 500))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -18,8 +66,15 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
 
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLALCHEMY_BINDS = {'replica': os.getenv('TEST_REPLICA_DATABASE_URL')} if os.getenv('TEST_REPLICA_DATABASE_URL') else {}
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,70 @@
+"""
+Configuración de gunicorn (gunicorn -c gunicorn.conf.py wsgi:app).
+Los valores se pueden cambiar con variables de entorno.
+"""
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Conexiones a PostgreSQL por host: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW + 1 del LISTEN
+# de alertas), más otro tanto del pool de la réplica si REPLICA_DATABASE_URL está definida.
+# DB_POOL_SIZE es threads por defecto y DB_MAX_OVERFLOW 0: con 4 CPU, 9 * (8 + 0 + 1) = 81.
+# La suma de todos los hosts tiene que quedar bajo max_connections; si no, bajar
+# WEB_CONCURRENCY o GUNICORN_THREADS (o poner PgBouncer delante).
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# gthread: cada cliente de /api/alertas/stream ocupa un hilo mientras está conectado.
+# Con muchos dashboards abiertos usar gevent (pip install gevent psycogreen); con gevent
+# threads no aplica y el pool queda en DB_POOL_SIZE, que conviene fijar explícitamente.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))  # solo gevent
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+max_requests = 5000
+max_requests_jitter = 500
+
+# Importa la app y los blueprints una sola vez en el maestro; los workers la heredan con fork
+preload_app = True
+
+
+def _app():
+    from wsgi import app
+    return app
+
+
+def on_starting(server):
+    """No arrancar con el esquema desactualizado (MIGRAR_AL_INICIAR=1 las aplica aquí)"""
+    from app import db
+    from app.migraciones import migrar, pendientes
+
+    app = _app()
+    with app.app_context():
+        if os.getenv('MIGRAR_AL_INICIAR') == '1':
+            for nombre in migrar():
+                server.log.info('Aplicada %s', nombre)
+        faltan = pendientes()
+        db.engine.dispose()  # que los workers no hereden conexiones del maestro
+    opciones = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    bases = 1 + len(app.config['SQLALCHEMY_BINDS'])
+    por_worker = (opciones['pool_size'] + opciones['max_overflow']) * bases + 1
+    server.log.info('Conexiones a la base: hasta %d (%d workers x %d)',
+                    server.cfg.workers * por_worker, server.cfg.workers, por_worker)
+    if faltan:
+        server.log.error('Migraciones pendientes: %s (flask --app wsgi migrar)', ', '.join(faltan))
+        sys.exit(1)
+
+
+def post_fork(server, worker):
+    if server.cfg.worker_class_str == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+    from app import db
+    with _app().app_context():
+        for motor in db.engines.values():
+            motor.dispose(close=False)
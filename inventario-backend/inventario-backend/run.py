@@ -1,10 +1,12 @@
-from app import create_app, db
+# Servidor de desarrollo. En producción: gunicorn -c gunicorn.conf.py wsgi:app
+from app import create_app
+from app.migraciones import migrar
 
 app = create_app()
 
-# Crear tablas si no existen
+# Aplicar migraciones de esquema pendientes (reemplaza a db.create_all())
 with app.app_context():
-    db.create_all()
+    migrar()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
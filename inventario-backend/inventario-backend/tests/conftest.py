@@ -0,0 +1,66 @@
+"""
+Fixtures de pytest: la app con TestingConfig sobre SQLite en memoria
+(TEST_DATABASE_URL permite apuntar a un PostgreSQL de pruebas).
+"""
+import pytest
+from sqlalchemy import event, text
+from app import create_app, db
+from app.models import Categoria, Proveedor, Cliente, Producto
+from app.inventario import registrar_movimientos
+
+PRODUCTOS = 20
+STOCK_INICIAL = 1000
+
+
+def habilitar_savepoints(engine):
+    """pysqlite abre las transacciones por su cuenta y rompe begin_nested(); se las deja a SQLAlchemy"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _conectar(conexion_dbapi, registro):
+        conexion_dbapi.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(conexion):
+        conexion.exec_driver_sql('BEGIN')
+
+
+def cargar_catalogo():
+    """Una categoría, un proveedor, un cliente y PRODUCTOS productos con STOCK_INICIAL unidades"""
+    categoria = Categoria(nombre='General')
+    db.session.add_all([categoria, Proveedor(nombre='Proveedor'), Cliente(nombre='Cliente')])
+    db.session.flush()
+    productos = [
+        Producto(sku=f'SKU{i:03}', nombre=f'Producto {i}', categoria_id=categoria.id,
+                 precio_compra=5, precio_venta=10, stock_actual=0, stock_minimo=3)
+        for i in range(1, PRODUCTOS + 1)
+    ]
+    db.session.add_all(productos)
+    db.session.flush()
+    # El stock inicial entra por el kardex, igual que en create_producto
+    registrar_movimientos([{'producto_id': p.id, 'cantidad': STOCK_INICIAL} for p in productos],
+                          'entrada', 'ajuste', observaciones='Stock inicial')
+    db.session.commit()
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        habilitar_savepoints(db.engine)
+        if db.engine.dialect.name == 'postgresql':
+            # Índices de trigramas de productos (ver v0005_busqueda_productos)
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db.create_all(bind_key=None)
+        cargar_catalogo()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,36 @@
+"""Alertas de stock que abren las ventas"""
+from app import db
+from app.models import Alerta
+from tests.conftest import STOCK_INICIAL
+
+
+def _vender(client, *cantidades):
+    respuesta = client.post('/api/ventas', json={
+        'punto_venta': 'POS-01',
+        'detalles': [{'producto_id': 1, 'cantidad': c, 'precio_unitario': 10} for c in cantidades]
+    })
+    assert respuesta.status_code == 201, respuesta.get_json()
+
+
+def _abiertas(app):
+    with app.app_context():
+        return [(a.tipo, a.mensaje) for a in db.session.scalars(
+            db.select(Alerta).where(Alerta.producto_id == 1, Alerta.leida == False))]
+
+
+def test_una_alerta_por_producto_con_el_stock_final(app, client):
+    _vender(client, STOCK_INICIAL - 2, 2)
+
+    abiertas = _abiertas(app)
+    assert len(abiertas) == 1
+    tipo, mensaje = abiertas[0]
+    assert tipo == 'stock_critico'
+    assert 'Actual: 0' in mensaje
+
+
+def test_stock_critico_reemplaza_al_stock_bajo(app, client):
+    _vender(client, STOCK_INICIAL - 2)
+    assert [t for t, _ in _abiertas(app)] == ['stock_bajo']
+
+    _vender(client, 2)
+    assert [t for t, _ in _abiertas(app)] == ['stock_critico']
@@ -0,0 +1,83 @@
+"""Los listados cargan sus relaciones en una cantidad fija de consultas (sin N+1)"""
+import pytest
+from sqlalchemy import event
+from app import db
+from tests.conftest import PRODUCTOS
+
+
+def _venta(i):
+    return {
+        'cliente_id': 1 if i % 2 else None,
+        'punto_venta': 'POS-01',
+        'detalles': [
+            {'producto_id': i % PRODUCTOS + 1, 'cantidad': 1, 'precio_unitario': 10},
+            {'producto_id': (i + 1) % PRODUCTOS + 1, 'cantidad': 2, 'precio_unitario': 10}
+        ]
+    }
+
+
+def _compra(i):
+    return {
+        'proveedor_id': 1,
+        'numero_documento': f'FAC-{i}',
+        'detalles': [
+            {'producto_id': i % PRODUCTOS + 1, 'cantidad': 5, 'precio_unitario': 5},
+            {'producto_id': (i + 1) % PRODUCTOS + 1, 'cantidad': 5, 'precio_unitario': 6}
+        ]
+    }
+
+
+def _crear(client, ruta, documento, desde, hasta):
+    for i in range(desde, hasta):
+        respuesta = client.post(ruta, json=documento(i))
+        assert respuesta.status_code == 201, respuesta.get_json()
+
+
+def _sentencias(app, client, ruta):
+    """Cantidad de sentencias SQL que ejecuta GET ruta, y la respuesta"""
+    sentencias = []
+
+    def contar(conexion, cursor, sql, *args):
+        sentencias.append(sql)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        respuesta = client.get(ruta)
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    assert respuesta.status_code == 200
+    return len(sentencias), respuesta.get_json()
+
+
+@pytest.mark.parametrize('ruta, documento', [
+    ('/api/ventas', _venta),
+    ('/api/compras', _compra),
+])
+def test_listado_no_crece_con_las_filas(app, client, ruta, documento):
+    _crear(client, ruta, documento, 0, 3)
+    pocas, filas = _sentencias(app, client, ruta)
+    assert len(filas) == 3
+
+    _crear(client, ruta, documento, 3, 15)
+    muchas, filas = _sentencias(app, client, ruta)
+    assert len(filas) == 15
+    assert all(len(f['detalles']) == 2 for f in filas)
+
+    assert muchas == pocas
+
+
+@pytest.mark.parametrize('ruta, documento', [
+    ('/api/ventas', _venta),
+    ('/api/compras', _compra),
+])
+def test_pagina_no_crece_con_las_filas(app, client, ruta, documento):
+    _crear(client, ruta, documento, 0, 3)
+    pocas, _ = _sentencias(app, client, ruta + '?limit=10')
+
+    _crear(client, ruta, documento, 3, 15)
+    muchas, pagina = _sentencias(app, client, ruta + '?limit=10')
+    assert len(pagina['items']) == 10
+
+    assert muchas == pocas
@@ -0,0 +1,60 @@
+"""El costo promedio incremental coincide con reconstruir_costos"""
+from app import db
+from app.models import Producto
+from app.agregados import reconstruir_costos
+
+
+def _post(client, ruta, documento):
+    respuesta = client.post(ruta, json=documento)
+    assert respuesta.status_code == 201, respuesta.get_json()
+    return respuesta.get_json()
+
+
+def _comprar(client, producto_id, cantidad, precio):
+    return _post(client, '/api/compras', {
+        'proveedor_id': 1,
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad, 'precio_unitario': precio}]
+    })
+
+
+def _vender(client, producto_id, cantidad):
+    return _post(client, '/api/ventas', {
+        'punto_venta': 'POS-01',
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad, 'precio_unitario': 20}]
+    })
+
+
+def _costos(app):
+    """Costo de cada producto: el que dejó el posteo y el que da reconstruir_costos"""
+    with app.app_context():
+        incremental = dict(db.session.execute(db.select(Producto.id, Producto.costo_promedio)).all())
+        reconstruir_costos()
+        reconstruido = dict(db.session.execute(db.select(Producto.id, Producto.costo_promedio)).all())
+        db.session.rollback()
+    return incremental, reconstruido
+
+
+def test_costo_incremental_igual_al_reconstruido(app, client):
+    nuevo = _post(client, '/api/productos', {
+        'sku': 'NUEVO', 'nombre': 'Nuevo', 'precio_compra': 7, 'precio_venta': 12, 'stock_actual': 40
+    })
+    _comprar(client, 1, 500, 8)
+    _vender(client, 1, 700)
+    _comprar(client, 1, 100, 6)
+    compra = _comprar(client, nuevo['id'], 10, 9)
+    _comprar(client, nuevo['id'], 30, 11)
+    assert client.delete(f"/api/compras/{compra['id']}").status_code == 200
+
+    incremental, reconstruido = _costos(app)
+    assert incremental == reconstruido
+    assert incremental[2] == 5  # sin compras: precio_compra
+
+
+def test_cambiar_precio_compra_recalcula_el_costo(app, client):
+    _comprar(client, 1, 1000, 9)
+    respuesta = client.put('/api/productos/1', json={'precio_compra': 3})
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['costo_promedio'] == 6
+
+    incremental, reconstruido = _costos(app)
+    assert incremental == reconstruido
@@ -0,0 +1,40 @@
+"""Idempotency-Key en los POST que crean documentos"""
+from app import db
+from app.models import Venta
+
+
+def _venta(cantidad):
+    return {
+        'punto_venta': 'POS-01',
+        'detalles': [{'producto_id': 1, 'cantidad': cantidad, 'precio_unitario': 10}]
+    }
+
+
+def _ventas(app):
+    with app.app_context():
+        return db.session.query(Venta).count()
+
+
+def test_reintento_devuelve_la_misma_respuesta(app, client):
+    primera = client.post('/api/ventas', json=_venta(1), headers={'Idempotency-Key': 'k1'})
+    assert primera.status_code == 201, primera.get_json()
+
+    reintento = client.post('/api/ventas', json=_venta(1), headers={'Idempotency-Key': 'k1'})
+    assert reintento.status_code == 201
+    assert reintento.headers['Idempotent-Replayed'] == 'true'
+    assert reintento.get_json() == primera.get_json()
+    assert _ventas(app) == 1
+
+
+def test_clave_reutilizada_con_otro_cuerpo(app, client):
+    client.post('/api/ventas', json=_venta(1), headers={'Idempotency-Key': 'k1'})
+
+    respuesta = client.post('/api/ventas', json=_venta(2), headers={'Idempotency-Key': 'k1'})
+    assert respuesta.status_code == 422
+    assert _ventas(app) == 1
+
+
+def test_clave_demasiado_larga(app, client):
+    respuesta = client.post('/api/ventas', json=_venta(1), headers={'Idempotency-Key': 'k' * 101})
+    assert respuesta.status_code == 400
+    assert _ventas(app) == 0
@@ -0,0 +1,56 @@
+"""
+Las consultas críticas de listados y reportes se resuelven con índice.
+EXPLAIN con enable_seqscan = off: solo corre con TEST_DATABASE_URL en PostgreSQL.
+"""
+import json
+import os
+import pytest
+from sqlalchemy import select, func, text
+from app import db
+from app.models import Venta, VentaDetalle, Compra, MovimientoInventario, Alerta, Producto
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv('TEST_DATABASE_URL', '').startswith('postgresql'),
+    reason='EXPLAIN de índices requiere TEST_DATABASE_URL en PostgreSQL'
+)
+
+CONSULTAS = {
+    'ventas_listado': select(Venta).order_by(Venta.fecha.desc(), Venta.id.desc()).limit(50),
+    'ventas_por_cliente': select(Venta).where(Venta.cliente_id == 1).order_by(Venta.fecha.desc()),
+    'ventas_por_punto_venta': select(Venta).where(Venta.punto_venta == 'POS-01').order_by(Venta.fecha.desc()),
+    'ventas_detalle_por_venta': select(VentaDetalle).where(VentaDetalle.venta_id.in_([1, 2, 3])),
+    'ventas_detalle_por_producto': select(VentaDetalle).where(VentaDetalle.producto_id == 1),
+    'compras_por_proveedor': select(Compra).where(Compra.proveedor_id == 1).order_by(Compra.fecha.desc()),
+    'movimientos_listado': select(MovimientoInventario).order_by(MovimientoInventario.fecha.desc()).limit(100),
+    'movimientos_por_producto': select(MovimientoInventario).where(
+        MovimientoInventario.producto_id == 1
+    ).order_by(MovimientoInventario.fecha.desc()).limit(100),
+    'movimientos_por_tipo_motivo': select(MovimientoInventario).where(
+        MovimientoInventario.tipo == 'salida', MovimientoInventario.motivo == 'venta'
+    ).order_by(MovimientoInventario.fecha.desc()).limit(100),
+    'alertas_pendientes': select(Alerta).where(Alerta.leida == False).order_by(Alerta.fecha.desc()),
+    'alertas_count': select(func.count(Alerta.id)).where(Alerta.leida == False),
+    'productos_buscar_sku': select(Producto.id).where(Producto.sku.ilike('AUD%')),
+    'productos_buscar_nombre': select(Producto.id).where(Producto.nombre.op('%>')('audifonos')),
+}
+
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get('Plans', []):
+        yield from _nodos(hijo)
+
+
+@pytest.mark.parametrize('nombre', CONSULTAS)
+def test_consulta_usa_indice(app, nombre):
+    with app.app_context(), db.engine.connect() as conn, conn.begin():
+        # Con tablas chicas el planificador prefiere Seq Scan; así solo lo usa si no hay índice
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        sql = CONSULTAS[nombre].compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+        # exec_driver_sql: el SQL ya viene con los % escapados para el driver
+        plan = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+    secuenciales = [n['Relation Name'] for n in _nodos(plan[0]['Plan']) if n['Node Type'] == 'Seq Scan']
+    assert secuenciales == []
@@ -0,0 +1,28 @@
+"""Las migraciones, con sus definiciones congeladas, dejan el mismo esquema que los modelos"""
+from sqlalchemy import create_engine, inspect
+from app import db
+from app.migraciones import migrar, pendientes, versiones
+
+
+def _esquema(engine):
+    insp = inspect(engine)
+    return {
+        tabla: (
+            {(c['name'], str(c['type']), c['nullable']) for c in insp.get_columns(tabla)},
+            {(i['name'], tuple(i['column_names']), bool(i['unique'])) for i in insp.get_indexes(tabla)},
+            {tuple(u['column_names']) for u in insp.get_unique_constraints(tabla)},
+            {(tuple(f['constrained_columns']), f['referred_table']) for f in insp.get_foreign_keys(tabla)},
+        )
+        for tabla in insp.get_table_names() if tabla != versiones.name
+    }
+
+
+def test_base_nueva_migrada_igual_a_los_modelos(app, tmp_path):
+    migrada = create_engine(f'sqlite:///{tmp_path / "migrada.db"}')
+    modelos = create_engine(f'sqlite:///{tmp_path / "modelos.db"}')
+    with app.app_context():
+        migrar(migrada)
+        assert pendientes(migrada) == []
+        db.metadata.create_all(modelos)
+
+    assert _esquema(migrada) == _esquema(modelos)
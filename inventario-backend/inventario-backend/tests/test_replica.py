@@ -0,0 +1,54 @@
+"""Enrutamiento de lecturas (app.replica) con dos bases SQLite como primaria y réplica"""
+import pytest
+from sqlalchemy import insert, select
+from config import TestingConfig
+from app import create_app, db
+from app.models import Categoria
+from app.replica import COOKIE_ESCRITURA
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "primaria.db"}')
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{tmp_path / "replica.db"}'})
+    app = create_app('testing')
+    # Cada base con una categoría distinta para saber cuál respondió
+    with app.app_context():
+        for motor, nombre in ((db.engines[None], 'Primaria'), (db.engines['replica'], 'Réplica')):
+            db.metadata.create_all(motor)
+            with motor.begin() as conexion:
+                conexion.execute(insert(Categoria).values(nombre=nombre))
+    return app
+
+
+def _categorias(client):
+    respuesta = client.get('/api/categorias')
+    assert respuesta.status_code == 200
+    return sorted(c['nombre'] for c in respuesta.get_json())
+
+
+def _en_base(app, bind):
+    with app.app_context():
+        with db.engines[bind].connect() as conexion:
+            return sorted(conexion.scalars(select(Categoria.nombre)))
+
+
+def test_get_lee_de_la_replica(client):
+    assert _categorias(client) == ['Réplica']
+
+
+def test_escritura_va_a_la_primaria(app, client):
+    respuesta = client.post('/api/categorias', json={'nombre': 'Nueva'})
+    assert respuesta.status_code == 201
+
+    assert _en_base(app, None) == ['Nueva', 'Primaria']
+    assert _en_base(app, 'replica') == ['Réplica']
+
+
+def test_despues_de_escribir_lee_de_la_primaria(app, client):
+    client.post('/api/categorias', json={'nombre': 'Nueva'})
+    assert client.get_cookie(COOKIE_ESCRITURA) is not None
+
+    # El mismo cliente ve su cambio; otro sin la cookie sigue leyendo la réplica
+    assert _categorias(client) == ['Nueva', 'Primaria']
+    assert _categorias(app.test_client()) == ['Réplica']
@@ -0,0 +1,24 @@
+"""El cache del resumen no sirve datos viejos después de un commit de otro proceso"""
+from app import db
+from app.inventario import registrar_movimientos
+from app.routes import reportes
+
+
+def _resumen(client):
+    respuesta = client.get('/api/reportes/resumen')
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+def test_venta_de_otro_worker_invalida_el_resumen(app, client, monkeypatch):
+    antes = _resumen(client)
+
+    # Otro worker: su commit no pasa por al_confirmar de este proceso
+    monkeypatch.setattr(reportes._cache_resumen, 'limpiar', lambda: None)
+    with app.app_context():
+        registrar_movimientos([{'producto_id': 1, 'cantidad': 998}], 'salida', 'ajuste')
+        db.session.commit()
+
+    despues = _resumen(client)
+    assert despues['productos_stock_bajo'] == antes['productos_stock_bajo'] + 1
+    assert despues['valor_inventario'] < antes['valor_inventario']
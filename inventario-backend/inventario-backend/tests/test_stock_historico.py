@@ -0,0 +1,65 @@
+"""stock_historico da lo mismo con y sin cierres de stock_diario, y coincide con el kardex"""
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app import db
+from app.models import MovimientoInventario
+from app.agregados import stock_historico, cerrar_stock_diario
+
+
+def _post(client, ruta, documento):
+    respuesta = client.post(ruta, json=documento)
+    assert respuesta.status_code == 201, respuesta.get_json()
+    return respuesta.get_json()
+
+
+def _fechar(ids, fecha):
+    db.session.execute(update(MovimientoInventario).where(MovimientoInventario.id.in_(ids)).values(fecha=fecha))
+
+
+def _historico(corte):
+    historico = stock_historico(corte)
+    return dict(db.session.execute(select(historico.c.producto_id, historico.c.stock)).all())
+
+
+def _kardex(corte):
+    """stock_nuevo del último movimiento anterior al corte, producto por producto"""
+    stock = {}
+    for m in db.session.scalars(select(MovimientoInventario).where(MovimientoInventario.fecha < corte).order_by(
+            MovimientoInventario.fecha, MovimientoInventario.id)):
+        stock[m.producto_id] = m.stock_nuevo
+    return stock
+
+
+def test_con_y_sin_cierres(app, client):
+    # Producto nuevo con stock inicial y ventas repartidas en el último mes
+    nuevo = _post(client, '/api/productos', {
+        'sku': 'NUEVO', 'nombre': 'Nuevo', 'precio_compra': 7, 'precio_venta': 12, 'stock_actual': 40
+    })
+    for cantidad in (5, 3, 2):
+        _post(client, '/api/ventas', {
+            'punto_venta': 'POS-01',
+            'detalles': [{'producto_id': nuevo['id'], 'cantidad': cantidad, 'precio_unitario': 12}]
+        })
+
+    hoy = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        ids = db.session.scalars(select(MovimientoInventario.id).order_by(MovimientoInventario.id)).all()
+        *iniciales, venta_1, venta_2, venta_3 = ids
+        _fechar(iniciales, hoy - timedelta(days=30))
+        for movimiento, dias in ((venta_1, 20), (venta_2, 10), (venta_3, 2)):
+            _fechar([movimiento], hoy - timedelta(days=dias))
+        db.session.commit()
+
+        cortes = [hoy - timedelta(days=d) for d in (31, 25, 15, 5, 1)]
+        productos = _historico(hoy).keys()
+        sin_cierres = {corte: _historico(corte) for corte in cortes}
+
+        for dias in range(30, 0, -1):
+            cerrar_stock_diario((hoy - timedelta(days=dias)).date())
+        db.session.commit()
+        con_cierres = {corte: _historico(corte) for corte in cortes}
+
+        for corte in cortes:
+            kardex = _kardex(corte)
+            assert sin_cierres[corte] == con_cierres[corte] == {p: kardex.get(p, 0) for p in productos}
+        assert con_cierres[cortes[2]][nuevo['id']] == 35
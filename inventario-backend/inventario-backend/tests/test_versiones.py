@@ -0,0 +1,22 @@
+"""Los movimientos de stock no cambian la versión del catálogo"""
+from app import db
+from app.models import VersionTabla
+
+
+def _version(app):
+    with app.app_context():
+        fila = db.session.get(VersionTabla, 'productos')
+        return fila.version if fila else 0
+
+
+def test_borrar_venta_no_cambia_la_version_de_productos(app, client):
+    respuesta = client.post('/api/ventas', json={
+        'punto_venta': 'POS-01',
+        'detalles': [{'producto_id': 1, 'cantidad': 1, 'precio_unitario': 10}]
+    })
+    assert respuesta.status_code == 201, respuesta.get_json()
+    antes = _version(app)
+
+    respuesta = client.delete(f"/api/ventas/{respuesta.get_json()['id']}")
+    assert respuesta.status_code == 200, respuesta.get_json()
+    assert _version(app) == antes
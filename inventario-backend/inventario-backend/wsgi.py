@@ -0,0 +1,13 @@
+"""
+Punto de entrada para producción.
+
+    flask --app wsgi migrar                  # una vez por despliegue
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+A diferencia de run.py no toca el esquema al importar: las migraciones se
+aplican aparte y gunicorn.conf.py solo verifica al arrancar que no falte ninguna.
+"""
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_CONFIG', 'production'))
@@ -1,6 +1,6 @@
 import { Routes, Route, NavLink } from 'react-router-dom'
 import { useState, useEffect } from 'react'
-import { getAlertasCount } from './api'
+import { abrirStreamAlertas } from './api'
 
 import Dashboard from './components/Dashboard'
 import Productos from './components/Productos'
@@ -18,22 +18,21 @@ import Login from './components/Login'
 function App() {
   const [alertasCount, setAlertasCount] = useState(0)
   const [isAuthenticated, setIsAuthenticated] = useState(false)
+  const [stream, setStream] = useState(null)
 
+  // Un solo EventSource para toda la app; cada pantalla escucha los eventos que usa
   useEffect(() => {
     if (!isAuthenticated) return
-    loadAlertasCount()
-    const interval = setInterval(loadAlertasCount, 30000000) // cada 30 seg
-    return () => clearInterval(interval)
-  }, [isAuthenticated])
-
-  const loadAlertasCount = async () => {
-    try {
-      const { data } = await getAlertasCount()
-      setAlertasCount(data.pendientes)
-    } catch (err) {
-      console.error('Error cargando alertas:', err)
+    const fuente = abrirStreamAlertas()
+    fuente.addEventListener('alertas', (e) => {
+      setAlertasCount(JSON.parse(e.data).pendientes)
+    })
+    setStream(fuente)
+    return () => {
+      fuente.close()
+      setStream(null)
     }
-  }
+  }, [isAuthenticated])
 
   const handleLogin = () => {
     setIsAuthenticated(true)
@@ -113,7 +112,7 @@ function App() {
 
       <main className="content">
         <Routes>
-          <Route path="/" element={<Dashboard />} />
+          <Route path="/" element={<Dashboard stream={stream} />} />
           <Route path="/productos" element={<Productos />} />
           <Route path="/categorias" element={<Categorias />} />
           <Route path="/proveedores" element={<Proveedores />} />
@@ -122,7 +121,7 @@ function App() {
           <Route path="/ventas" element={<Ventas />} />
           <Route path="/devoluciones" element={<Devoluciones />} />
           <Route path="/movimientos" element={<Movimientos />} />
-          <Route path="/alertas" element={<Alertas onUpdate={loadAlertasCount} />} />
+          <Route path="/alertas" element={<Alertas stream={stream} />} />
           <Route path="/reportes" element={<Reportes />} />
         </Routes>
       </main>
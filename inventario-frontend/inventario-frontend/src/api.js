@@ -27,6 +27,7 @@ export const deleteCliente = (id) => api.delete(`/clientes/${id}`)
 
 // Productos
 export const getProductos = (params) => api.get('/productos', { params })
+export const buscarProductos = (q, limit = 20) => api.get('/productos/buscar', { params: { q, limit } })
 export const getProducto = (id) => api.get(`/productos/${id}`)
 export const createProducto = (data) => api.post('/productos', data)
 export const updateProducto = (id, data) => api.put(`/productos/${id}`, data)
@@ -51,6 +52,8 @@ export const crearAjuste = (data) => api.post('/movimientos/ajuste', data)
 // Alertas
 export const getAlertas = (pendientes = true) => api.get('/alertas', { params: { pendientes } })
 export const getAlertasCount = () => api.get('/alertas/count')
+// Eventos en vivo: alerta, alertas (contador de pendientes) y stock
+export const abrirStreamAlertas = () => new EventSource('/api/alertas/stream')
 export const marcarAlertaLeida = (id) => api.put(`/alertas/${id}/leer`)
 export const marcarTodasLeidas = () => api.put('/alertas/leer-todas')
 
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { getAlertas, marcarAlertaLeida, marcarTodasLeidas } from '../api'
 
-function Alertas({ onUpdate }) {
+function Alertas({ stream }) {
   const [alertas, setAlertas] = useState([])
   const [loading, setLoading] = useState(true)
   const [mostrarTodas, setMostrarTodas] = useState(false)
@@ -10,6 +10,17 @@ function Alertas({ onUpdate }) {
     loadData()
   }, [mostrarTodas])
 
+  // Alertas nuevas o repetidas llegan por el stream de App; el contador del menú también
+  useEffect(() => {
+    if (!stream) return
+    const alNuevaAlerta = (e) => {
+      const alerta = JSON.parse(e.data)
+      setAlertas(prev => [alerta, ...prev.filter(a => a.id !== alerta.id)])
+    }
+    stream.addEventListener('alerta', alNuevaAlerta)
+    return () => stream.removeEventListener('alerta', alNuevaAlerta)
+  }, [stream])
+
   const loadData = async () => {
     try {
       const { data } = await getAlertas(!mostrarTodas)
@@ -25,7 +36,6 @@ function Alertas({ onUpdate }) {
     try {
       await marcarAlertaLeida(id)
       loadData()
-      if (onUpdate) onUpdate()
     } catch (err) {
       console.error(err)
     }
@@ -35,7 +45,6 @@ function Alertas({ onUpdate }) {
     try {
       await marcarTodasLeidas()
       loadData()
-      if (onUpdate) onUpdate()
     } catch (err) {
       console.error(err)
     }
@@ -90,6 +99,7 @@ function Alertas({ onUpdate }) {
                 <p>{a.mensaje}</p>
                 <span className="alerta-fecha">
                   {new Date(a.fecha).toLocaleString()}
+                  {a.ocurrencias > 1 && ` · ${a.ocurrencias} veces`}
                 </span>
               </div>
               {!a.leida && (
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { getResumen, getMasVendidos, getAlertas } from '../api'
 
-function Dashboard() {
+function Dashboard({ stream }) {
   const [resumen, setResumen] = useState(null)
   const [masVendidos, setMasVendidos] = useState([])
   const [alertas, setAlertas] = useState([])
@@ -11,6 +11,26 @@ function Dashboard() {
     loadData()
   }, [])
 
+  // Cambios en vivo (stream de App) en lugar de volver a pedir todo
+  useEffect(() => {
+    if (!stream) return
+    const alNuevaAlerta = (e) => {
+      const alerta = JSON.parse(e.data)
+      setAlertas(prev => [alerta, ...prev.filter(a => a.id !== alerta.id)].slice(0, 5))
+    }
+    const alContador = (e) => {
+      const { pendientes } = JSON.parse(e.data)
+      setResumen(prev => prev && { ...prev, alertas_pendientes: pendientes })
+      if (pendientes === 0) setAlertas([])
+    }
+    stream.addEventListener('alerta', alNuevaAlerta)
+    stream.addEventListener('alertas', alContador)
+    return () => {
+      stream.removeEventListener('alerta', alNuevaAlerta)
+      stream.removeEventListener('alertas', alContador)
+    }
+  }, [stream])
+
   const loadData = async () => {
     try {
       const [resumenRes, vendidosRes, alertasRes] = await Promise.all([